@@ -0,0 +1,226 @@
+"""
+Static asset pipeline.
+
+`python manage.py build-assets` copies the built CSS, JS and images into
+`app/static/dist` under content-hashed names (`css/output.3f2a9b1c0d4e.css`),
+writes gzip and brotli variants of text assets next to them, and records
+the mapping in `dist/manifest.json`. Run it after rebuilding the Tailwind
+CSS and on every deploy.
+
+Templates link assets through `asset_url()`. A fingerprinted URL changes
+whenever its content does, so those files are served with an immutable
+one-year Cache-Control and repeat page loads transfer nothing. Uploaded
+component images change at runtime and are never built; their URLs carry
+the file's mtime (`?v=...`) instead. Without a build, every URL falls back
+to the mtime form, so a checkout works before the first build.
+
+Brotli variants are only written when the optional `brotli` package is
+installed; gzip always is.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles
+
+STATIC_DIR = "app/static"
+DIST = "dist"
+MANIFEST = "manifest.json"
+
+# Written at runtime, versioned by mtime instead of built
+RUNTIME_DIRS = ("uploads",)
+
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+
+# Only keep a compressed variant that saves at least this much
+MIN_SAVING = 0.1
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Source path -> built path, loaded on first use
+_manifest = None
+
+
+# =========================
+# Build
+# =========================
+def _fingerprinted(path: str, digest: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest[:12]}{ext}"
+
+
+def _sources(static_dir: str):
+    skip = {DIST, *RUNTIME_DIRS}
+    for root, dirs, files in os.walk(static_dir):
+        if root == static_dir:
+            dirs[:] = [d for d in dirs if d not in skip]
+        for name in files:
+            full = os.path.join(root, name)
+            yield os.path.relpath(full, static_dir).replace(os.sep, "/"), full
+
+
+def _compress(path: str, data: bytes):
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+
+    for suffix, compressed in variants:
+        if len(compressed) <= len(data) * (1 - MIN_SAVING):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+def _read_manifest(dist_dir: str) -> dict:
+    try:
+        with open(os.path.join(dist_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_assets(static_dir: str = STATIC_DIR) -> dict:
+    """
+    Fingerprint and precompress every static file except runtime uploads.
+    Files of the previous build are kept so pages rendered just before a
+    deploy can still load theirs; anything older is removed.
+    """
+    global _manifest
+
+    dist_dir = os.path.join(static_dir, DIST)
+    previous = _read_manifest(dist_dir)
+
+    manifest = {}
+    for path, full in _sources(static_dir):
+        with open(full, "rb") as f:
+            data = f.read()
+
+        built = _fingerprinted(path, hashlib.sha256(data).hexdigest())
+        manifest[path] = built
+
+        target = os.path.join(dist_dir, built)
+        if os.path.exists(target):
+            continue
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(full, target)
+        if os.path.splitext(path)[1] in COMPRESSIBLE:
+            _compress(target, data)
+
+    keep = {MANIFEST, *manifest.values(), *previous.values()}
+    for path, full in list(_sources(dist_dir)):
+        base = path
+        for _, suffix in ENCODINGS:
+            base = base.removesuffix(suffix)
+        if base not in keep:
+            os.remove(full)
+
+    partial = os.path.join(dist_dir, MANIFEST + ".part")
+    with open(partial, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(partial, os.path.join(dist_dir, MANIFEST))
+
+    _manifest = None
+    return manifest
+
+
+# =========================
+# URLs
+# =========================
+def _built() -> dict:
+    global _manifest
+    if _manifest is None:
+        _manifest = _read_manifest(os.path.join(STATIC_DIR, DIST))
+    return _manifest
+
+
+def asset_url(path: str) -> str:
+    """URL of a static file that is safe to cache forever. Jinja global."""
+    built = _built().get(path)
+    if built:
+        return f"/static/{DIST}/{built}"
+
+    try:
+        version = os.stat(os.path.join(STATIC_DIR, path)).st_mtime_ns
+    except OSError:
+        return f"/static/{path}"
+    return f"/static/{path}?v={version:x}"
+
+
+# =========================
+# Serving
+# =========================
+def accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if params and float(q) == 0:
+                continue
+        except ValueError:
+            pass
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticAssets(StaticFiles):
+    """
+    StaticFiles that serves a precompressed variant of built assets when the
+    client accepts one, and marks fingerprinted or versioned URLs immutable.
+    """
+
+    async def get_response(self, path: str, scope):
+        built = path.startswith(DIST + "/")
+        versioned = built or "v" in parse_qs(scope.get("query_string", b"").decode("latin-1"))
+
+        if built:
+            response = await self._precompressed(path, scope)
+            if response is not None:
+                return response
+
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE if versioned else REVALIDATE
+            if built:
+                response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    async def _precompressed(self, path: str, scope):
+        if os.path.splitext(path)[1] not in COMPRESSIBLE:
+            return None
+
+        headers = dict(scope["headers"])
+        accepted = accepted_encodings(headers.get(b"accept-encoding", b"").decode("latin-1"))
+
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await run_in_threadpool(self.lookup_path, path + suffix)
+            if stat_result is None:
+                continue
+            return FileResponse(
+                full_path,
+                stat_result=stat_result,
+                media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+                headers={
+                    "Content-Encoding": encoding,
+                    "Cache-Control": IMMUTABLE,
+                    "Vary": "Accept-Encoding"
+                }
+            )
+        return None
@@ -0,0 +1,338 @@
+"""
+Audit trail of admin changes.
+
+Routes that mutate users, components or stock locations stamp their session
+with the acting user (`set_actor`). While such a session flushes, field-level before/after
+diffs of audited models are collected; once the transaction commits they are
+handed to a background writer, so the request never pays for an extra
+commit. Rolled-back changes are never recorded.
+
+Set-based UPDATE statements bypass ORM attribute history, so code issuing
+them on an audited table reports the change itself with `record()`.
+
+Entries are stored in one table per month (`audit_log_YYYY_MM`), each indexed
+by (entity, entity_id, ts) and (actor_id, ts). Searches only touch the
+partitions overlapping the requested date range.
+"""
+import json
+import logging
+import queue
+import re
+import threading
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, DateTime, Index, Integer, MetaData, String, Table, Text,
+    and_, event, inspect, or_, select, union_all
+)
+
+from app.core.database import SessionLocal, engine
+from app.models.component import Component
+from app.models.stock_location import StockLocation
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "audit_log_"
+PARTITION_PATTERN = re.compile(r"^audit_log_(\d{4})_(\d{2})$")
+
+FLUSH_INTERVAL = 1.0
+BATCH_SIZE = 500
+
+# Audited models and the columns never worth recording
+AUDITED = {
+    User: {"created_at"},
+    Component: {"created_at", "value_num", "voltage_num", "watt_num"},
+    StockLocation: set(),
+}
+MASKED = {"password_hash"}
+
+metadata = MetaData()
+
+
+def partition_name(ts: datetime) -> str:
+    return f"{PARTITION_PREFIX}{ts:%Y_%m}"
+
+
+def partition_table(name: str) -> Table:
+    if name in metadata.tables:
+        return metadata.tables[name]
+
+    return Table(
+        name, metadata,
+        Column("id", Integer, primary_key=True),
+        Column("ts", DateTime, nullable=False),
+        Column("actor_id", Integer),
+        Column("entity", String, nullable=False),
+        Column("entity_id", Integer, nullable=False),
+        Column("action", String, nullable=False),
+        Column("changes", Text, nullable=False),
+        Index(f"ix_{name}_entity", "entity", "entity_id", "ts"),
+        Index(f"ix_{name}_actor", "actor_id", "ts"),
+    )
+
+
+# =========================
+# Buffered writer
+# =========================
+class AuditWriter:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._created = set()
+
+    def submit(self, entries: list[dict]):
+        for entry in entries:
+            self._queue.put(entry)
+        self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the thread after writing whatever is still buffered."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def _run(self):
+        while True:
+            batch = self._drain()
+            if batch:
+                self._write(batch)
+            elif self._stop.is_set():
+                return
+
+    def _drain(self) -> list[dict]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=FLUSH_INTERVAL))
+            while len(batch) < BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch: list[dict]):
+        by_partition = {}
+        for entry in batch:
+            by_partition.setdefault(partition_name(entry["ts"]), []).append(entry)
+
+        try:
+            with engine.begin() as conn:
+                for name, entries in by_partition.items():
+                    table = partition_table(name)
+                    if name not in self._created:
+                        table.create(bind=conn, checkfirst=True)
+                        self._created.add(name)
+                    conn.execute(table.insert(), entries)
+        except Exception:
+            logger.exception("Dropped %d audit entries", len(batch))
+
+
+audit_writer = AuditWriter()
+
+
+# =========================
+# Capture
+# =========================
+def set_actor(db, user):
+    """Record changes committed by this session as made by `user` (None: the system, e.g. the CLI)."""
+    db.info["audit_actor"] = user.id if user else None
+
+
+def auditing(session) -> bool:
+    return "audit_actor" in session.info
+
+
+def _add_entry(session, entity: str, entity_id: int, action: str, changes: dict, now: datetime):
+    # One entry per row and transaction, even across several flushes
+    pending = session.info.setdefault("audit_entries", {})
+
+    key = (entity, entity_id)
+    entry = pending.get(key)
+    if entry is None:
+        pending[key] = {
+            "ts": now,
+            "actor_id": session.info["audit_actor"],
+            "entity": entity,
+            "entity_id": entity_id,
+            "action": action,
+            "changes": changes
+        }
+        return
+
+    if action == "delete":
+        entry["action"] = "delete"
+    for name, (old, new) in changes.items():
+        first = entry["changes"].get(name, [old, new])[0]
+        entry["changes"][name] = [first, new]
+
+
+def record(session, entity: str, entity_id: int, changes: dict, action: str = "update"):
+    """
+    Audit a change made by a set-based statement: `changes` maps column
+    names to [old, new]. Written on commit like ORM changes; ignored
+    unless the session has an actor.
+    """
+    if not auditing(session):
+        return
+    changes = {name: [_plain(old), _plain(new)] for name, (old, new) in changes.items()}
+    _add_entry(session, entity, entity_id, action, changes, datetime.utcnow())
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _diff(obj, action: str, skip: set) -> dict:
+    changes = {}
+    for attr in inspect(obj).mapper.column_attrs:
+        name = attr.key
+        if name in skip:
+            continue
+
+        history = inspect(obj).attrs[name].history
+        if action == "create":
+            old, new = None, getattr(obj, name)
+        elif action == "delete":
+            old, new = getattr(obj, name), None
+        elif history.has_changes():
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+        else:
+            continue
+
+        if old == new or (action != "update" and name == "id"):
+            continue
+        changes[name] = [_plain(old), _plain(new)]
+    return changes
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def collect_audit_entries(session, flush_context):
+    if not auditing(session):
+        return
+
+    now = datetime.utcnow()
+    for obj in session.new | session.dirty | session.deleted:
+        skip = AUDITED.get(type(obj))
+        if skip is None:
+            continue
+
+        if obj in session.new:
+            action = "create"
+        elif obj in session.deleted:
+            action = "delete"
+        else:
+            action = "update"
+
+        changes = _diff(obj, action, skip)
+        if changes:
+            _add_entry(session, type(obj).__tablename__, obj.id, action, changes, now)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def write_audit_entries(session):
+    pending = session.info.pop("audit_entries", None)
+    if not pending:
+        return
+
+    entries = []
+    for entry in pending.values():
+        changes = {
+            name: [old and "***", new and "***"] if name in MASKED else [old, new]
+            for name, (old, new) in entry["changes"].items()
+            if old != new
+        }
+        if changes:
+            entries.append({**entry, "changes": json.dumps(changes, separators=(",", ":"), default=str)})
+    if entries:
+        audit_writer.submit(entries)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def discard_audit_entries(session):
+    session.info.pop("audit_entries", None)
+
+
+# =========================
+# Search
+# =========================
+def partitions(start: datetime | None = None, end: datetime | None = None) -> list[str]:
+    """Existing partitions overlapping [start, end], newest first."""
+    names = []
+    for name in inspect(engine).get_table_names():
+        match = PARTITION_PATTERN.match(name)
+        if not match:
+            continue
+
+        month = (int(match.group(1)), int(match.group(2)))
+        if start and month < (start.year, start.month):
+            continue
+        if end and month > (end.year, end.month):
+            continue
+        names.append(name)
+
+    return sorted(names, reverse=True)
+
+
+def search(
+    entity: str | None = None,
+    entity_id: int | None = None,
+    actor_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    before: datetime | None = None,
+    before_id: int | None = None,
+    limit: int = 100
+) -> list[dict]:
+    """
+    Newest-first entries matching the filters, one indexed query per partition.
+    Pages continue after the (before, before_id) keyset of the previous
+    page's last entry; entries of one flush share a timestamp, and always a
+    partition, so the id breaks ties.
+    """
+    names = partitions(start, min(filter(None, (end, before)), default=None))
+    if not names:
+        return []
+
+    selects = []
+    for name in names:
+        table = partition_table(name)
+        stmt = select(table)
+        if entity:
+            stmt = stmt.where(table.c.entity == entity)
+        if entity_id is not None:
+            stmt = stmt.where(table.c.entity_id == entity_id)
+        if actor_id is not None:
+            stmt = stmt.where(table.c.actor_id == actor_id)
+        if start:
+            stmt = stmt.where(table.c.ts >= start)
+        if end:
+            stmt = stmt.where(table.c.ts <= end)
+        if before and before_id is not None:
+            stmt = stmt.where(or_(
+                table.c.ts < before,
+                and_(table.c.ts == before, table.c.id < before_id)
+            ))
+        elif before:
+            stmt = stmt.where(table.c.ts < before)
+        selects.append(stmt.order_by(table.c.ts.desc(), table.c.id.desc()).limit(limit).subquery().select())
+
+    query = union_all(*selects).subquery()
+    stmt = select(query).order_by(query.c.ts.desc(), query.c.id.desc()).limit(limit)
+
+    with engine.connect() as conn:
+        rows = conn.execute(stmt).mappings().all()
+
+    return [{**row, "changes": json.loads(row["changes"])} for row in rows]
@@ -0,0 +1,197 @@
+"""
+Online snapshots of the SQLite database.
+
+Snapshots are taken with SQLite's online backup API a few hundred pages at a
+time, releasing the read lock and pausing between steps so borrow/return
+writes are never blocked for long. If another connection writes mid-copy,
+SQLite restarts the copy, so a finished snapshot is always consistent.
+Each snapshot gets a sha256 sidecar file (`sha256sum -c` compatible) and is
+only trusted for a restore once both the checksum and an integrity check
+pass.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.database import SessionLocal, engine
+from app.models.job_state import JobState
+
+BACKUP_DIR = os.getenv("INVENTORY_BACKUP_DIR", "app/db/backups")
+BACKUP_KEEP = int(os.getenv("INVENTORY_BACKUP_KEEP", "14"))
+BACKUP_INTERVAL = int(os.getenv("INVENTORY_BACKUP_INTERVAL", str(6 * 3600)))
+
+PAGES_PER_STEP = 256
+STEP_PAUSE = 0.005
+
+SNAPSHOT_PREFIX = "inventory-"
+SNAPSHOT_SUFFIX = ".db"
+CHECKSUM_SUFFIX = ".sha256"
+
+SNAPSHOT_JOB = "backup_snapshot"
+
+
+class BackupError(Exception):
+    pass
+
+
+def database_path() -> str:
+    return engine.url.database
+
+
+def checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy(
+    source: str,
+    target: str,
+    pause: float = STEP_PAUSE,
+    pages: int = PAGES_PER_STEP,
+    journal_mode: str = "DELETE"
+):
+    """
+    Copy `source` into `target` and leave the target in `journal_mode`.
+    The copy inherits WAL mode from the live database; snapshots and
+    replicas are switched back so each stays one self-contained file.
+    """
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        # The progress callback runs between steps, after the source read lock is released
+        src.backup(dst, pages=pages, progress=lambda *_: time.sleep(pause))
+        dst.execute(f"PRAGMA journal_mode={journal_mode}")
+    finally:
+        dst.close()
+        src.close()
+
+
+def snapshot(backup_dir: str = BACKUP_DIR, label: str = "") -> str:
+    """Copy the live database into a new timestamped snapshot and return its path."""
+    os.makedirs(backup_dir, exist_ok=True)
+
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    name = f"{SNAPSHOT_PREFIX}{stamp}{'-' + label if label else ''}{SNAPSHOT_SUFFIX}"
+    path = os.path.join(backup_dir, name)
+
+    # A unique partial file, so concurrent snapshots never write the same one
+    fd, partial = tempfile.mkstemp(dir=backup_dir, prefix=name + ".", suffix=".part")
+    os.close(fd)
+    try:
+        _copy(database_path(), partial)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    with open(path + CHECKSUM_SUFFIX, "w") as f:
+        f.write(f"{checksum(path)}  {name}\n")
+
+    return path
+
+
+def snapshots(backup_dir: str = BACKUP_DIR) -> list[str]:
+    """Snapshot paths, newest first."""
+    if not os.path.isdir(backup_dir):
+        return []
+
+    names = [
+        n for n in os.listdir(backup_dir)
+        if n.startswith(SNAPSHOT_PREFIX) and n.endswith(SNAPSHOT_SUFFIX)
+    ]
+    return [os.path.join(backup_dir, n) for n in sorted(names, reverse=True)]
+
+
+def verify(path: str):
+    """Raise BackupError unless the snapshot matches its checksum and passes an integrity check."""
+    if not os.path.exists(path):
+        raise BackupError(f"{path}: not found")
+
+    try:
+        with open(path + CHECKSUM_SUFFIX) as f:
+            expected = f.read().split()[0]
+    except (OSError, IndexError):
+        raise BackupError(f"{path}: missing checksum file")
+
+    if checksum(path) != expected:
+        raise BackupError(f"{path}: checksum mismatch")
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+
+    if result != "ok":
+        raise BackupError(f"{path}: integrity check failed: {result}")
+
+
+def prune(keep: int = BACKUP_KEEP, backup_dir: str = BACKUP_DIR) -> list[str]:
+    """Delete all but the newest `keep` snapshots. Returns the removed paths."""
+    removed = snapshots(backup_dir)[keep:]
+    for path in removed:
+        os.remove(path)
+        if os.path.exists(path + CHECKSUM_SUFFIX):
+            os.remove(path + CHECKSUM_SUFFIX)
+    return removed
+
+
+def restore(path: str, target: str | None = None) -> str | None:
+    """
+    Verify a snapshot and copy it over the target database (the live one by
+    default). Restoring over the live database first snapshots it and
+    returns that path. Stop the app first, or writes landing between the
+    safety snapshot and the copy are lost.
+    """
+    verify(path)
+
+    target = target or database_path()
+    safety = snapshot(os.path.dirname(path) or ".", label="pre-restore") if target == database_path() else None
+
+    # The live database runs in WAL mode (see app.core.database)
+    _copy(path, target, pause=0, journal_mode="WAL" if target == database_path() else "DELETE")
+    return safety
+
+
+def _claim_scheduled_run(now: datetime) -> bool:
+    """
+    Every worker runs the scheduler: only the one whose conditional UPDATE
+    moves the last-run time on takes the snapshot for this interval.
+    """
+    db = SessionLocal()
+    try:
+        db.execute(
+            sqlite_insert(JobState)
+            .values(name=SNAPSHOT_JOB, value="", updated_at=now)
+            .on_conflict_do_nothing(index_elements=[JobState.name])
+        )
+        # Half an interval of slack for workers whose schedules drift apart
+        due = (now - timedelta(seconds=BACKUP_INTERVAL / 2)).isoformat()
+        claimed = db.execute(
+            update(JobState)
+            .where(JobState.name == SNAPSHOT_JOB, JobState.value < due)
+            .values(value=now.isoformat(), updated_at=now)
+        ).rowcount
+        db.commit()
+        return claimed == 1
+    finally:
+        db.close()
+
+
+def scheduled_snapshot():
+    """Scheduler job: snapshot, verify, then apply retention."""
+    if not _claim_scheduled_run(datetime.utcnow()):
+        return
+
+    path = snapshot()
+    verify(path)
+    prune()
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DATABASE_URL = "sqlite:///app/db/inventory.db"
@@ -7,6 +7,62 @@ engine = create_engine(
     DATABASE_URL, connect_args={"check_same_thread": False}
 )
 
+
+@event.listens_for(engine, "connect")
+def use_wal(dbapi_connection, connection_record):
+    # Readers and the writer no longer block each other; the mode is stored
+    # in the file, so this only converts it once
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+
+def add_missing_columns():
+    """
+    create_all() only creates missing tables. Add columns and indexes that
+    were added to existing models since the table was created.
+    New columns must be nullable or have a server default.
+    """
+    inspector = inspect(engine)
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(engine.dialect)
+                    conn.execute(text(
+                        f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                    ))
+
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
+# =========================
+# Maintenance
+# =========================
+def vacuum():
+    """Rebuild the database file, reclaiming free pages. Locks out writers while it runs."""
+    # VACUUM can't run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+
+
+def analyze():
+    """Refresh the statistics the query planner picks indexes with."""
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def integrity_check() -> list[str]:
+    """Problems found by PRAGMA integrity_check; empty when the database is sound."""
+    with engine.connect() as conn:
+        rows = [r[0] for r in conn.execute(text("PRAGMA integrity_check"))]
+    return [] if rows == ["ok"] else rows
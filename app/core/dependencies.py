@@ -1,8 +1,15 @@
+from datetime import datetime, timedelta
+
 from fastapi import Request, HTTPException, status, Depends
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
+from app.core.replica import report_session
+from app.core.security import hash_api_token
+from app.models.api_token import ApiToken
 from app.models.user import User
 
+TOKEN_TOUCH_INTERVAL = timedelta(minutes=5)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -10,6 +17,14 @@ def get_db():
     finally:
         db.close()
 
+def get_report_db():
+    """Read-only session on the reporting replica, for exports and analytics."""
+    db = report_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def require_login(request: Request, db: Session = Depends(get_db)):
     user_id = request.session.get("user_id")
     if not user_id:
@@ -25,3 +40,36 @@ def require_admin(user=Depends(require_login)):
     if user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
     return user
+
+def require_api_user(request: Request, db: Session = Depends(get_db)):
+    """
+    Machine clients authenticate with `Authorization: Bearer <token>`.
+    Browser calls fall back to the logged-in session.
+    """
+    auth = request.headers.get("authorization", "")
+    scheme, _, token = auth.partition(" ")
+
+    if scheme.lower() != "bearer" or not token:
+        user = require_login(request, db)
+    else:
+        api_token = db.query(ApiToken).filter(
+            ApiToken.token_hash == hash_api_token(token.strip()),
+            ApiToken.is_active == True
+        ).first()
+        if not api_token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+        user = db.query(User).filter(User.id == api_token.user_id).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+        # Only touch last_used_at occasionally so reads stay read-only
+        now = datetime.utcnow()
+        if not api_token.last_used_at or now - api_token.last_used_at > TOKEN_TOUCH_INTERVAL:
+            api_token.last_used_at = now
+            db.commit()
+
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+    return user
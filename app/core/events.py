@@ -0,0 +1,182 @@
+"""
+Stock change feed.
+
+Quantity changes on `Component` are collected while a session flushes and
+published only once the transaction commits, so subscribers never see a
+rolled-back borrow. Publishing goes through a pluggable broker:
+
+- `InProcessBroker` fans events out to subscribers of this worker.
+- `RedisBroker` relays events between workers over Redis pub/sub
+  (set INVENTORY_EVENT_BROKER=redis://host:6379/0; needs the `redis`
+  package from requirements.txt).
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event, inspect
+
+from app.core.database import SessionLocal
+from app.models.component import Component
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 256
+REDIS_CHANNEL = "inventory:stock"
+
+# Seconds between attempts to resubscribe after losing Redis, doubling up to the max
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 30
+
+
+class Subscription:
+    def __init__(self, broker, loop: asyncio.AbstractEventLoop):
+        self.broker = broker
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def push(self, event: dict):
+        # Slow consumers lose their oldest events rather than blocking writers
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> dict | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(self, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, events: list[dict]):
+        self.deliver(events)
+
+    def deliver(self, events: list[dict]):
+        # Called from request worker threads, hand off to each subscriber's loop
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for sub in subscribers:
+            for e in events:
+                try:
+                    sub.loop.call_soon_threadsafe(sub.push, e)
+                except RuntimeError:
+                    # Subscriber's event loop already closed
+                    self.unsubscribe(sub)
+
+
+class RedisBroker(InProcessBroker):
+    def __init__(self, url: str):
+        super().__init__()
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    def publish(self, events: list[dict]):
+        self._redis.publish(REDIS_CHANNEL, json.dumps(events))
+
+    def _listen(self):
+        # Events published while disconnected are lost; open pages still
+        # show correct quantities on their next load
+        delay = RECONNECT_DELAY
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(REDIS_CHANNEL)
+                delay = RECONNECT_DELAY
+                for message in pubsub.listen():
+                    self.deliver(json.loads(message["data"]))
+            except Exception:
+                logger.exception("Stock event feed lost its Redis connection, retrying in %ds", delay)
+            finally:
+                pubsub.close()
+
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        url = os.getenv("INVENTORY_EVENT_BROKER", "")
+        _broker = RedisBroker(url) if url.startswith("redis") else InProcessBroker()
+    return _broker
+
+
+def set_broker(broker):
+    global _broker
+    _broker = broker
+
+
+# =========================
+# Commit hooks
+# =========================
+def note_stock_change(session, component_id: int, quantity: int, delta: int):
+    """
+    Record a quantity change to publish on commit. Used directly by
+    set-based UPDATE statements that bypass ORM attribute history.
+    """
+    changes = session.info.setdefault("stock_changes", {})
+
+    entry = changes.setdefault(component_id, {"id": component_id, "quantity": quantity, "delta": 0})
+    entry["quantity"] = quantity
+    entry["delta"] += delta
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def collect_stock_changes(session, flush_context):
+    for obj in session.new | session.dirty | session.deleted:
+        if not isinstance(obj, Component):
+            continue
+
+        history = inspect(obj).attrs.quantity.history
+        if obj in session.deleted:
+            old, new = obj.quantity or 0, 0
+        elif obj in session.new:
+            old, new = 0, obj.quantity or 0
+        elif history.has_changes():
+            old = history.deleted[0] if history.deleted else 0
+            new = obj.quantity or 0
+        else:
+            continue
+
+        note_stock_change(session, obj.id, new, new - (old or 0))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def publish_stock_changes(session):
+    changes = session.info.pop("stock_changes", None) or {}
+    events = [c for c in changes.values() if c["delta"]]
+    if events:
+        get_broker().publish(events)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def discard_stock_changes(session):
+    session.info.pop("stock_changes", None)
@@ -0,0 +1,153 @@
+"""
+Read-only reporting replica of the SQLite database.
+
+Exports and analytics read a copy of the database instead of the live
+file, so a long report never holds a read transaction next to borrow and
+return writes. The copy is taken with the online backup API in a single
+step: the live database runs in WAL mode, so the one read transaction
+doesn't block writers, and nothing written mid-copy forces a restart. It
+is written beside the replica and renamed over it, so readers only ever
+see a complete file.
+
+The replica is only rebuilt when a report asks for it. A report that finds
+it older than REPORT_MAX_AGE seconds (or missing) reads the live database
+instead, and a background thread rebuilds the copy for the next one.
+Exports are therefore at most that stale, requests never wait for a copy,
+and an idle system copies nothing. A job_state claim keeps several workers
+from copying at the same time. A replica left by an earlier process is
+always replaced, so it never lags a schema migration.
+Setting INVENTORY_REPORT_MAX_AGE=0 turns the replica off and reports read
+the live database again.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.backup import _copy, database_path
+from app.core.database import SessionLocal, engine
+from app.models.job_state import JobState
+
+logger = logging.getLogger(__name__)
+
+REPLICA_PATH = os.getenv("INVENTORY_REPLICA_PATH", "app/db/reports.db")
+REPORT_MAX_AGE = int(os.getenv("INVENTORY_REPORT_MAX_AGE", "300"))
+
+REFRESH_JOB = "replica_refresh"
+
+# A replica file is never modified once renamed into place, so connections
+# can skip locking altogether. Without a pool, every session opens whichever
+# file is current.
+report_engine = create_engine(
+    f"sqlite:///file:{REPLICA_PATH}?mode=ro&immutable=1&uri=true",
+    connect_args={"check_same_thread": False},
+    poolclass=NullPool
+)
+
+_lock = threading.Lock()
+
+# Replicas written before this process started may predate its schema
+_process_started = time.time()
+
+
+def replica_age() -> float | None:
+    """Seconds since the replica was written, None when there is none usable."""
+    try:
+        written = os.path.getmtime(REPLICA_PATH)
+    except OSError:
+        return None
+    return time.time() - written if written >= _process_started else None
+
+
+def refresh_replica() -> str:
+    """Copy the live database over the replica."""
+    started = time.perf_counter()
+
+    # One partial file per process, in case several workers refresh at once
+    partial = f"{REPLICA_PATH}.{os.getpid()}.part"
+    try:
+        _copy(database_path(), partial, pause=0, pages=-1)
+        os.replace(partial, REPLICA_PATH)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    logger.info("Refreshed reporting replica in %.2fs", time.perf_counter() - started)
+    return REPLICA_PATH
+
+
+def _claim_refresh(now: datetime) -> bool:
+    """Only the worker whose conditional UPDATE moves the last-refresh time on copies."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            sqlite_insert(JobState)
+            .values(name=REFRESH_JOB, value="", updated_at=now)
+            .on_conflict_do_nothing(index_elements=[JobState.name])
+        )
+        # A refresh that failed elsewhere is retried after half the max age
+        due = (now - timedelta(seconds=REPORT_MAX_AGE / 2)).isoformat()
+        claimed = db.execute(
+            update(JobState)
+            .where(JobState.name == REFRESH_JOB, JobState.value < due)
+            .values(value=now.isoformat(), updated_at=now)
+        ).rowcount
+        db.commit()
+        return claimed == 1
+    finally:
+        db.close()
+
+
+def _refresh():
+    try:
+        if _claim_refresh(datetime.utcnow()):
+            refresh_replica()
+    except Exception:
+        logger.exception("Reporting replica refresh failed")
+    finally:
+        _lock.release()
+
+
+def refresh_in_background():
+    """Rebuild the replica on a background thread, unless one is already running."""
+    if not _lock.acquire(blocking=False):
+        return
+    threading.Thread(target=_refresh, name="replica-refresh", daemon=True).start()
+
+
+class ReportingSession(Session):
+    """
+    Reads the replica while it is fresh. Otherwise reads the live database
+    and has the replica rebuilt in the background for later reports.
+    """
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self._report_bind = None
+
+    def get_bind(self, mapper=None, **kw):
+        # Decided on the first query, i.e. after the report's access checks
+        if self._report_bind is None:
+            age = replica_age()
+            if age is not None and age < REPORT_MAX_AGE:
+                self._report_bind = report_engine
+            else:
+                refresh_in_background()
+                self._report_bind = engine
+        return self._report_bind
+
+
+ReportSession = sessionmaker(class_=ReportingSession, autocommit=False, autoflush=False)
+
+
+def report_session() -> Session:
+    """A session for long reads: the replica, or the live database when it is off."""
+    if REPORT_MAX_AGE <= 0:
+        return SessionLocal()
+    return ReportSession()
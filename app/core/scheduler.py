@@ -0,0 +1,62 @@
+"""
+Minimal in-process job scheduler.
+
+Jobs run on one daemon thread in next-run order. Each job must be
+idempotent: with several workers every process runs its own scheduler.
+"""
+import heapq
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    def __init__(self):
+        self._jobs = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_job(self, func, interval: float, name: str | None = None):
+        self._jobs.append((name or func.__name__, func, interval))
+
+    def job(self, interval: float, name: str | None = None):
+        def decorator(func):
+            self.add_job(func, interval, name)
+            return func
+        return decorator
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        now = time.monotonic()
+        queue = [(now + interval, i) for i, (_, _, interval) in enumerate(self._jobs)]
+        heapq.heapify(queue)
+
+        while queue and not self._stop.is_set():
+            next_run, i = queue[0]
+            if self._stop.wait(max(0, next_run - time.monotonic())):
+                break
+
+            heapq.heappop(queue)
+            name, func, interval = self._jobs[i]
+            try:
+                func()
+            except Exception:
+                logger.exception("Scheduled job %s failed", name)
+
+            heapq.heappush(queue, (time.monotonic() + interval, i))
+
+
+scheduler = Scheduler()
@@ -1,9 +1,31 @@
-from passlib.context import CryptContext
+import hashlib
+import secrets
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def password_context():
+    # passlib and its bcrypt backend are loaded on first use, not at import
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def warm_password_context():
+    """Load the bcrypt backend ahead of the first login."""
+    password_context().handler("bcrypt").get_backend()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_context().hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    return password_context().verify(password, hashed)
+
+
+def generate_api_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def hash_api_token(token: str) -> str:
+    # API tokens are high-entropy random strings, a fast digest is enough
+    return hashlib.sha256(token.encode()).hexdigest()
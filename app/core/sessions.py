@@ -0,0 +1,261 @@
+"""
+Server-side browser sessions.
+
+The cookie only carries a random session id; the session dict lives in a
+store keyed by the id's sha256. That keeps cookies small however many flash
+messages are queued, and lets an admin revoke every session of a user when
+disabling them or resetting their password.
+
+Expiry slides: a session lives SESSION_TTL seconds past its last use. Two
+stores are available (INVENTORY_SESSION_STORE):
+
+- `sqlite` (default): the `web_sessions` table, shared by every worker and
+  kept across restarts. To keep reads read-only, the expiry of a session is
+  only pushed forward once it is TOUCH_INTERVAL old.
+- `memory`: a per-process dict, for a single worker or development.
+
+Expired sessions are removed by a scheduler job, an indexed range delete.
+"""
+import hashlib
+import json
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, update
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+from app.core.database import engine
+from app.models.web_session import WebSession
+
+SESSION_COOKIE = "session"
+# Set in a session dict to have the middleware move it to a new id
+ROTATE_KEY = "_rotate"
+SESSION_TTL = int(os.getenv("INVENTORY_SESSION_TTL", str(8 * 3600)))
+TOUCH_INTERVAL = timedelta(minutes=5)
+
+
+def session_key(session_id: str) -> str:
+    return hashlib.sha256(session_id.encode()).hexdigest()
+
+
+# =========================
+# Stores
+# =========================
+class MemorySessionStore:
+    def __init__(self, ttl: int = SESSION_TTL):
+        self.ttl = timedelta(seconds=ttl)
+        self._lock = threading.Lock()
+        # key -> (data, user_id, expires_at), least recently used first. With
+        # a fixed TTL that is also expiry order, so cleanup stops at the
+        # first live session.
+        self._sessions = OrderedDict()
+        self._by_user = {}
+
+    def get(self, key: str) -> dict | None:
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                return None
+            data, user_id, expires_at = entry
+            if expires_at <= now:
+                self._remove(key)
+                return None
+            self._sessions[key] = (data, user_id, now + self.ttl)
+            self._sessions.move_to_end(key)
+            return json.loads(data)
+
+    def set(self, key: str, data: dict, user_id: int | None):
+        with self._lock:
+            self._remove(key)
+            self._sessions[key] = (json.dumps(data), user_id, datetime.utcnow() + self.ttl)
+            if user_id is not None:
+                self._by_user.setdefault(user_id, set()).add(key)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def revoke_user(self, user_id: int) -> int:
+        with self._lock:
+            keys = list(self._by_user.get(user_id, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def cleanup(self) -> int:
+        now = datetime.utcnow()
+        removed = 0
+        with self._lock:
+            while self._sessions:
+                key, (_, _, expires_at) = next(iter(self._sessions.items()))
+                if expires_at > now:
+                    break
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def _remove(self, key: str):
+        entry = self._sessions.pop(key, None)
+        if entry is None or entry[1] is None:
+            return
+        keys = self._by_user.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry[1]]
+
+
+class SqliteSessionStore:
+    def __init__(self, ttl: int = SESSION_TTL):
+        self.ttl = timedelta(seconds=ttl)
+        self.table = WebSession.__table__
+
+    def get(self, key: str) -> dict | None:
+        now = datetime.utcnow()
+        with engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.c.data, self.table.c.expires_at)
+                .where(self.table.c.key == key, self.table.c.expires_at > now)
+            ).first()
+        if row is None:
+            return None
+
+        if row.expires_at - now < self.ttl - TOUCH_INTERVAL:
+            with engine.begin() as conn:
+                conn.execute(
+                    update(self.table)
+                    .where(self.table.c.key == key)
+                    .values(expires_at=now + self.ttl)
+                )
+        return json.loads(row.data)
+
+    def set(self, key: str, data: dict, user_id: int | None):
+        values = {
+            "data": json.dumps(data),
+            "user_id": user_id,
+            "expires_at": datetime.utcnow() + self.ttl
+        }
+        with engine.begin() as conn:
+            updated = conn.execute(
+                update(self.table).where(self.table.c.key == key).values(**values)
+            ).rowcount
+            if not updated:
+                conn.execute(insert(self.table).values(key=key, **values))
+
+    def delete(self, key: str):
+        with engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.key == key))
+
+    def revoke_user(self, user_id: int) -> int:
+        with engine.begin() as conn:
+            return conn.execute(
+                delete(self.table).where(self.table.c.user_id == user_id)
+            ).rowcount
+
+    def cleanup(self) -> int:
+        with engine.begin() as conn:
+            return conn.execute(
+                delete(self.table).where(self.table.c.expires_at <= datetime.utcnow())
+            ).rowcount
+
+
+_store = None
+
+
+def get_session_store():
+    global _store
+    if _store is None:
+        kind = os.getenv("INVENTORY_SESSION_STORE", "sqlite")
+        _store = MemorySessionStore() if kind == "memory" else SqliteSessionStore()
+    return _store
+
+
+def set_session_store(store):
+    global _store
+    _store = store
+
+
+def revoke_user_sessions(user_id: int) -> int:
+    """Log a user out everywhere. Returns the number of sessions dropped."""
+    return get_session_store().revoke_user(user_id)
+
+
+def rotate_session(session: dict):
+    """Reissue the current session under a new id when the response is sent."""
+    session[ROTATE_KEY] = True
+
+
+def cleanup_sessions() -> int:
+    """Scheduler job: drop expired sessions."""
+    return get_session_store().cleanup()
+
+
+# =========================
+# Middleware
+# =========================
+class ServerSessionMiddleware:
+    """
+    Drop-in replacement for starlette's SessionMiddleware: `request.session`
+    is still a plain dict. The store is only written when the session
+    changed, and a new session id is issued whenever the logged-in user
+    changes, so an id handed out before login can't be fixed on a victim,
+    or when a route asks for it with rotate_session().
+    """
+
+    def __init__(self, app, exclude_paths: tuple = ("/static",), https_only: bool = False):
+        self.app = app
+        self.exclude_paths = exclude_paths
+        self.security_flags = "httponly; samesite=lax" + ("; secure" if https_only else "")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+
+        store = get_session_store()
+        session_id = HTTPConnection(scope).cookies.get(SESSION_COOKIE)
+        loaded = await run_in_threadpool(store.get, session_key(session_id)) if session_id else None
+
+        scope["session"] = dict(loaded or {})
+        original = json.dumps(loaded, sort_keys=True)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                await self._commit(store, scope["session"], loaded, original, session_id, message)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _commit(self, store, session, loaded, original, session_id, message):
+        headers = MutableHeaders(scope=message)
+        rotate = session.pop(ROTATE_KEY, False)
+
+        if not session:
+            if loaded is not None:
+                await run_in_threadpool(store.delete, session_key(session_id))
+                headers.append(
+                    "Set-Cookie",
+                    f"{SESSION_COOKIE}=null; path=/; expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.security_flags}"
+                )
+            return
+
+        if rotate or loaded is None or session.get("user_id") != loaded.get("user_id"):
+            if loaded is not None:
+                await run_in_threadpool(store.delete, session_key(session_id))
+            session_id = secrets.token_urlsafe(32)
+        elif json.dumps(session, sort_keys=True) == original:
+            # Unchanged: the store already slid the expiry, only refresh the cookie
+            headers.append("Set-Cookie", self._cookie(session_id))
+            return
+
+        await run_in_threadpool(store.set, session_key(session_id), session, session.get("user_id"))
+        headers.append("Set-Cookie", self._cookie(session_id))
+
+    def _cookie(self, session_id: str) -> str:
+        return f"{SESSION_COOKIE}={session_id}; path=/; Max-Age={SESSION_TTL}; {self.security_flags}"
@@ -0,0 +1,87 @@
+"""
+Application startup.
+
+Creating tables, additive migrations and backfills run from the app's
+lifespan hook instead of at import time, so importing the app or a single
+model never touches the schema. Deployments that migrate once before
+starting several workers (`python -m app.core.startup`) can skip the step
+per worker with INVENTORY_SKIP_MIGRATE=1.
+
+The in-memory facet and part-number indexes and the bcrypt backend are
+loaded in a background thread, so the first stock page or login doesn't pay
+for them. Import and startup durations are logged against a budget.
+"""
+import logging
+import os
+import threading
+import time
+
+from app.core.database import Base, SessionLocal, add_missing_columns, engine
+from app.core.security import warm_password_context
+from app.services.facets import facet_index
+from app.services.fuzzy import fuzzy_index
+from app.services.loans import backfill_due_dates
+from app.services.locations import backfill_stock_locations
+from app.services.parametric import backfill_parametric_values
+
+# Models (registered for create_all)
+from app.models import user, component, request, api_token, reservation, job_state, outbox, loan_period, stock_location, request_archive, web_session, kit, forecast, cycle_count
+
+logger = logging.getLogger(__name__)
+
+SKIP_MIGRATE = os.getenv("INVENTORY_SKIP_MIGRATE") == "1"
+STARTUP_BUDGET_MS = int(os.getenv("INVENTORY_STARTUP_BUDGET_MS", "1500"))
+
+
+def migrate():
+    """Bring the schema up to date and backfill derived columns. Safe to re-run."""
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    backfill_due_dates()
+    backfill_stock_locations()
+    backfill_parametric_values()
+
+
+def warm_caches():
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        facet_index.warm(db)
+        fuzzy_index.warm(db)
+        warm_password_context()
+    except Exception:
+        # Nothing is lost: every cache still loads on first use
+        logger.exception("Cache warm-up failed")
+        return
+    finally:
+        db.close()
+
+    logger.info("Caches warmed in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+def start(import_started: float):
+    """
+    Run once from the lifespan hook. `import_started` is a perf_counter()
+    reading taken before the app module imported anything.
+    """
+    started = time.perf_counter()
+    if not SKIP_MIGRATE:
+        migrate()
+    migrated = time.perf_counter()
+
+    threading.Thread(target=warm_caches, name="cache-warmup", daemon=True).start()
+
+    import_ms = (started - import_started) * 1000
+    migrate_ms = (migrated - started) * 1000
+    total_ms = (migrated - import_started) * 1000
+
+    log = logger.warning if total_ms > STARTUP_BUDGET_MS else logger.info
+    log(
+        "Startup took %.0f ms (import %.0f ms, migrate %.0f ms), budget %d ms",
+        total_ms, import_ms, migrate_ms, STARTUP_BUDGET_MS
+    )
+
+
+if __name__ == "__main__":
+    migrate()
+    print("Schema up to date")
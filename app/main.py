@@ -1,36 +1,51 @@
+import time
+
+IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from starlette.middleware.sessions import SessionMiddleware
 
-from app.core.database import Base, engine
+from app.core import startup
+from app.core.assets import StaticAssets, asset_url
+from app.core.audit import audit_writer
+from app.core.backup import BACKUP_INTERVAL, scheduled_snapshot
+from app.core.scheduler import scheduler
+from app.core.sessions import ServerSessionMiddleware, cleanup_sessions
+from app.services.reservations import expire_reservations
+from app.services.archive import archive_returned_requests
+from app.services.forecast import refresh_forecasts
+from app.services.loans import sweep_overdue
 from app.routers import profile
 from app.routers import reports
 
 
 
 # Routers
-from app.routers import auth, request, stock, returns, users
+from app.routers import auth, request, stock, returns, users, api, scan, events, reservations, kits, counts
 
 
-# Models (ALIAS request model)
-from app.models import user, component, request as request_model
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema checks and cache warm-up happen here, not at import
+    startup.start(IMPORT_STARTED)
+    scheduler.start()
+    yield
+    scheduler.stop()
+    audit_writer.stop()
 
-app = FastAPI()
 
-app.add_middleware(
-    SessionMiddleware,
-    secret_key="super-secret-key"
-)
+app = FastAPI(lifespan=lifespan)
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.add_middleware(ServerSessionMiddleware)
+
+app.mount("/static", StaticAssets(directory="app/static"), name="static")
 
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["asset_url"] = asset_url
 app.state.templates = templates
 
-# Create DB tables
-Base.metadata.create_all(bind=engine)
-
 # Register routers
 app.include_router(auth.router)
 app.include_router(request.router)
@@ -39,4 +54,17 @@ app.include_router(returns.router)
 app.include_router(users.router)
 app.include_router(profile.router)
 app.include_router(reports.router)
+app.include_router(api.router)
+app.include_router(scan.router)
+app.include_router(events.router)
+app.include_router(reservations.router)
+app.include_router(kits.router)
+app.include_router(counts.router)
 
+# Background jobs
+scheduler.add_job(expire_reservations, interval=60)
+scheduler.add_job(sweep_overdue, interval=300)
+scheduler.add_job(archive_returned_requests, interval=86400)
+scheduler.add_job(scheduled_snapshot, interval=BACKUP_INTERVAL)
+scheduler.add_job(cleanup_sessions, interval=600)
+scheduler.add_job(refresh_forecasts, interval=3600)
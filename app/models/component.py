@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Float
 from app.core.database import Base
 from datetime import datetime
 
@@ -20,5 +20,16 @@ class Component(Base):
     quantity = Column(Integer, default=0)
     image_path = Column(String)
 
+    # Normalized from value/voltage/watt for range filters
+    value_num = Column(Float, index=True)
+    voltage_num = Column(Float, index=True)
+    watt_num = Column(Float, index=True)
+
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Also stamped by set-based UPDATEs; other workers' catalog indexes poll it
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    # Soft delete: kept for the requests that reference it
+    deleted_at = Column(DateTime)
+
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class CycleCount(Base):
+    """A physical count of one rack, applied to stock as a single adjustment."""
+    __tablename__ = "cycle_counts"
+
+    id = Column(Integer, primary_key=True)
+    rack = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="open", index=True)  # open | applied | cancelled
+    reason = Column(String)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    applied_by = Column(Integer, ForeignKey("users.id"))
+    applied_at = Column(DateTime)
+
+
+class CycleCountLine(Base):
+    """
+    Counted quantity of one component at one location of the rack.
+    `expected` is the bin's quantity when the count was recorded, so
+    counted - expected is the adjustment whatever moves afterwards.
+    """
+    __tablename__ = "cycle_count_lines"
+
+    id = Column(Integer, primary_key=True)
+    count_id = Column(Integer, ForeignKey("cycle_counts.id"), nullable=False)
+    component_id = Column(Integer, ForeignKey("components.id"), nullable=False)
+    location = Column(String, nullable=False, default="")
+    counted = Column(Integer, nullable=False)
+    expected = Column(Integer, nullable=False, default=0)
+    counted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Also serves lookups of a count's lines
+        UniqueConstraint("count_id", "component_id", "location", name="uq_cycle_count_lines_place"),
+    )
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index, text
+
+from app.core.database import Base
+
+
+class Forecast(Base):
+    """Latest demand forecast per component, rewritten by the forecast batch job."""
+    __tablename__ = "forecasts"
+
+    component_id = Column(Integer, ForeignKey("components.id"), primary_key=True)
+
+    # Units borrowed per day
+    short_average = Column(Float, nullable=False)
+    long_average = Column(Float, nullable=False)
+    trend = Column(Float, nullable=False)  # change in daily demand per day
+    daily_rate = Column(Float, nullable=False)
+
+    days_remaining = Column(Float)  # NULL: no recent demand
+    reorder_point = Column(Integer, nullable=False)
+    reorder_quantity = Column(Integer, nullable=False)
+
+    computed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Reorder list: parts to order, soonest to run out first
+        Index("ix_forecasts_reorder", "days_remaining", sqlite_where=text("reorder_quantity > 0")),
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class JobState(Base):
+    """Small key/value store for scheduled job watermarks."""
+    __tablename__ = "job_state"
+
+    name = Column(String, primary_key=True)
+    value = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
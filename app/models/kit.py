@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class Kit(Base):
+    """A bill of materials borrowed as one unit, e.g. everything one build job needs."""
+    __tablename__ = "kits"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    description = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class KitItem(Base):
+    __tablename__ = "kit_items"
+
+    id = Column(Integer, primary_key=True)
+    kit_id = Column(Integer, ForeignKey("kits.id"), nullable=False)
+    component_id = Column(Integer, ForeignKey("components.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # Also serves lookups of a kit's lines
+        UniqueConstraint("kit_id", "component_id", name="uq_kit_items_component"),
+    )
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+
+from app.core.database import Base
+
+
+class LoanPeriod(Base):
+    __tablename__ = "loan_periods"
+
+    category = Column(String, primary_key=True)
+    days = Column(Integer, nullable=False)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class OutboxMessage(Base):
+    """Notifications waiting for a sender (mail, chat, ...) to pick them up."""
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    request_id = Column(Integer, ForeignKey("requests.id"))
+    # The due date a reminder is about: one reminder per loan and due date
+    due_at = Column(DateTime)
+    payload = Column(String)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_outbox_pending", "sent_at", "id"),
+        # A unique index rather than a constraint, so existing databases get it too
+        Index("uq_outbox_reminder", "kind", "request_id", "due_at", unique=True),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from datetime import datetime
 from app.core.database import Base
 
@@ -8,8 +8,27 @@ class Request(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     component_id = Column(Integer, ForeignKey("components.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("stock_locations.id"))
     quantity = Column(Integer, nullable=False)
     status = Column(String, default="borrowed")
     requested_at = Column(DateTime, default=datetime.utcnow)
+    due_at = Column(DateTime)
     returned_at = Column(DateTime)
     remarks = Column(String)
+
+    __table_args__ = (
+        # Overdue queries: open loans in due-date order
+        Index("ix_requests_status_due", "status", "due_at", "id"),
+        # Archival: returned loans in return-date order
+        Index("ix_requests_status_returned", "status", "returned_at"),
+    )
+
+
+class RequestLocation(Base):
+    """Units one request took from one location, so a return restocks the same bins."""
+    __tablename__ = "request_locations"
+
+    id = Column(Integer, primary_key=True)
+    request_id = Column(Integer, ForeignKey("requests.id"), nullable=False, index=True)
+    location_id = Column(Integer, ForeignKey("stock_locations.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class RequestArchive(Base):
+    """Returned requests moved out of `requests` once they are old enough."""
+    __tablename__ = "requests_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False)
+    component_id = Column(Integer, nullable=False)
+    location_id = Column(Integer)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String)
+    requested_at = Column(DateTime)
+    due_at = Column(DateTime)
+    returned_at = Column(DateTime)
+    remarks = Column(String)
+
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_requests_archive_requested", "requested_at"),
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class Reservation(Base):
+    __tablename__ = "reservations"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    component_id = Column(Integer, ForeignKey("components.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String, default="active")  # active / converted / released / expired
+    remarks = Column(String)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    closed_at = Column(DateTime)
+
+    __table_args__ = (
+        # Expiry sweep walks active holds in expiry order
+        Index("ix_reservations_status_expires", "status", "expires_at"),
+        # Availability sums active holds per component
+        Index("ix_reservations_component_status", "component_id", "status", "expires_at"),
+    )
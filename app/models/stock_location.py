@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, UniqueConstraint
+
+from app.core.database import Base
+
+
+class StockLocation(Base):
+    """
+    Quantity of one component at one rack/location.
+    Component.quantity holds the total across all locations.
+    """
+    __tablename__ = "stock_locations"
+
+    id = Column(Integer, primary_key=True)
+    component_id = Column(Integer, ForeignKey("components.id"), nullable=False)
+    rack = Column(String, nullable=False, default="")
+    location = Column(String, nullable=False, default="")
+    quantity = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("component_id", "rack", "location", name="uq_stock_locations_place"),
+        Index("ix_stock_locations_rack_location", "rack", "location"),
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+
+from app.core.database import Base
+
+
+class WebSession(Base):
+    __tablename__ = "web_sessions"
+
+    # sha256 of the cookie value, so a leaked table can't be replayed
+    key = Column(String, primary_key=True)
+    user_id = Column(Integer, index=True)
+    data = Column(Text, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,446 @@
+import base64
+import binascii
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.audit import set_actor
+from app.core.dependencies import get_db, require_api_user, require_login
+from app.core.security import generate_api_token, hash_api_token
+from app.models.api_token import ApiToken
+from app.models.component import Component
+from app.models.request import Request as RequestModel
+from app.models.reservation import Reservation
+from app.models.stock_location import StockLocation
+from app.services import inventory, reservations
+from app.services.fuzzy import fuzzy_index
+
+router = APIRouter(prefix="/api/v1", tags=["api"])
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+COMPONENT_COLUMNS = (
+    "id", "category", "description", "value", "size", "voltage", "watt",
+    "type", "part_no", "rack", "location", "quantity", "image_path",
+    "created_at"
+)
+
+REQUEST_COLUMNS = (
+    "id", "user_id", "component_id", "quantity", "status",
+    "requested_at", "returned_at", "due_at", "location_id", "remarks"
+)
+
+RESERVATION_COLUMNS = (
+    "id", "user_id", "component_id", "quantity", "status", "remarks",
+    "created_at", "expires_at", "closed_at"
+)
+
+
+# ================= SCHEMAS =================
+class ComponentIn(BaseModel):
+    category: str
+    description: str
+    value: str | None = None
+    size: str | None = None
+    voltage: str | None = None
+    watt: str | None = None
+    type: str | None = None
+    part_no: str
+    rack: str | None = None
+    location: str | None = None
+    quantity: int = Field(0, ge=0)
+
+
+class ComponentPatch(BaseModel):
+    category: str | None = None
+    description: str | None = None
+    value: str | None = None
+    size: str | None = None
+    voltage: str | None = None
+    watt: str | None = None
+    type: str | None = None
+    part_no: str | None = None
+    rack: str | None = None
+    location: str | None = None
+    quantity: int | None = Field(None, ge=0)
+
+
+class BorrowIn(BaseModel):
+    component_id: int
+    quantity: int
+    remarks: str | None = None
+    location_id: int | None = None
+
+
+class ReturnIn(BaseModel):
+    quantity: int
+
+
+class ReserveIn(BaseModel):
+    component_id: int
+    quantity: int
+    hours: int = reservations.DEFAULT_HOLD_HOURS
+    remarks: str | None = None
+
+
+class TokenIn(BaseModel):
+    name: str
+
+
+# ================= HELPERS =================
+def parse_fields(fields: str | None, allowed: tuple) -> tuple:
+    """
+    Turn `?fields=id,part_no,quantity` into a column tuple.
+    `id` is always included because cursors are keyed on it.
+    """
+    if not fields:
+        return allowed
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    if "id" not in selected:
+        selected.insert(0, "id")
+
+    return tuple(selected)
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> int | None:
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded).decode())
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def compact(row, columns: tuple) -> dict:
+    """Serialize a row, dropping nulls to keep payloads small."""
+    out = {}
+    for name in columns:
+        value = getattr(row, name)
+        if value is None:
+            continue
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        out[name] = value
+    return out
+
+
+def paginate(query, model, columns: tuple, cursor: str | None, limit: int) -> dict:
+    after = decode_cursor(cursor)
+    if after is not None:
+        query = query.filter(model.id > after)
+
+    rows = (
+        query
+        .with_entities(*[getattr(model, c) for c in columns])
+        .order_by(model.id)
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "data": [compact(r, columns) for r in rows],
+        "next_cursor": encode_cursor(rows[-1].id) if has_more else None
+    }
+
+
+def admin_only(user):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+
+# ================= COMPONENTS =================
+@router.get("/components")
+def list_components(
+    fields: str | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    category: str | None = Query(None),
+    part_no: str | None = Query(None),
+    rack: str | None = Query(None),
+    location: str | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    columns = parse_fields(fields, COMPONENT_COLUMNS)
+    query = db.query(Component).filter(Component.deleted_at.is_(None))
+
+    # Exact matches so machine lookups can use the indexes
+    if category:
+        query = query.filter(Component.category == category)
+    if part_no:
+        query = query.filter(Component.part_no == part_no)
+    # Stock lives in bins, so match any of them, as the stock page does
+    if rack:
+        query = query.filter(Component.id.in_(
+            select(StockLocation.component_id).where(StockLocation.rack == rack)
+        ))
+    if location:
+        query = query.filter(Component.id.in_(
+            select(StockLocation.component_id).where(StockLocation.location == location)
+        ))
+
+    return paginate(query, Component, columns, cursor, limit)
+
+
+@router.get("/components/suggest")
+def suggest_components(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    fields: str | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    """Ranked near matches for a possibly mistyped part number or description."""
+    columns = parse_fields(fields, COMPONENT_COLUMNS)
+    matches = fuzzy_index.search(db, q, limit)
+
+    components = {
+        c.id: c
+        for c in db.query(Component).filter(Component.id.in_([cid for cid, _ in matches]))
+    }
+    return {
+        "data": [
+            {**compact(components[cid], columns), "score": round(score, 3)}
+            for cid, score in matches
+            if cid in components
+        ]
+    }
+
+
+@router.get("/components/{component_id}")
+def get_component(
+    component_id: int,
+    fields: str | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    columns = parse_fields(fields, COMPONENT_COLUMNS)
+    return compact(inventory.get_component(db, component_id), columns)
+
+
+@router.post("/components", status_code=201)
+def create_component(
+    payload: ComponentIn,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    admin_only(current_user)
+    set_actor(db, current_user)
+
+    component = inventory.create_component(db, **payload.model_dump())
+    return compact(component, COMPONENT_COLUMNS)
+
+
+@router.patch("/components/{component_id}")
+def update_component(
+    component_id: int,
+    payload: ComponentPatch,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    admin_only(current_user)
+    set_actor(db, current_user)
+
+    component = inventory.get_component(db, component_id)
+    component = inventory.update_component(db, component, **payload.model_dump(exclude_unset=True))
+    return compact(component, COMPONENT_COLUMNS)
+
+
+@router.delete("/components/{component_id}", status_code=204)
+def delete_component(
+    component_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    admin_only(current_user)
+    set_actor(db, current_user)
+
+    inventory.delete_component(db, inventory.get_component(db, component_id))
+    return Response(status_code=204)
+
+
+# ================= REQUESTS / RETURNS =================
+@router.get("/requests")
+def list_requests(
+    fields: str | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    status: str | None = Query(None),
+    component_id: int | None = Query(None),
+    user_id: int | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    columns = parse_fields(fields, REQUEST_COLUMNS)
+    query = db.query(RequestModel)
+
+    # Non-admins only see their own requests
+    if current_user.role != "admin":
+        user_id = current_user.id
+
+    if user_id is not None:
+        query = query.filter(RequestModel.user_id == user_id)
+    if status:
+        query = query.filter(RequestModel.status == status)
+    if component_id is not None:
+        query = query.filter(RequestModel.component_id == component_id)
+
+    return paginate(query, RequestModel, columns, cursor, limit)
+
+
+@router.post("/requests", status_code=201)
+def create_request(
+    payload: BorrowIn,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    req = inventory.borrow_component(
+        db, current_user, payload.component_id, payload.quantity,
+        payload.remarks, payload.location_id
+    )
+    return compact(req, REQUEST_COLUMNS)
+
+
+@router.post("/requests/{request_id}/return")
+def return_request(
+    request_id: int,
+    payload: ReturnIn,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    req = inventory.return_request(db, current_user, request_id, payload.quantity)
+    return compact(req, REQUEST_COLUMNS)
+
+
+# ================= RESERVATIONS =================
+@router.get("/reservations")
+def list_reservations(
+    fields: str | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    status: str | None = Query(None),
+    component_id: int | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    columns = parse_fields(fields, RESERVATION_COLUMNS)
+    query = db.query(Reservation)
+
+    if current_user.role != "admin":
+        query = query.filter(Reservation.user_id == current_user.id)
+    if status:
+        query = query.filter(Reservation.status == status)
+    if component_id is not None:
+        query = query.filter(Reservation.component_id == component_id)
+
+    return paginate(query, Reservation, columns, cursor, limit)
+
+
+@router.post("/reservations", status_code=201)
+def create_reservation(
+    payload: ReserveIn,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    reservation = reservations.reserve(
+        db, current_user, payload.component_id, payload.quantity,
+        payload.hours, payload.remarks
+    )
+    return compact(reservation, RESERVATION_COLUMNS)
+
+
+@router.post("/reservations/{reservation_id}/convert", status_code=201)
+def convert_reservation(
+    reservation_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    req = reservations.convert(db, current_user, reservation_id)
+    return compact(req, REQUEST_COLUMNS)
+
+
+@router.post("/reservations/{reservation_id}/release")
+def release_reservation(
+    reservation_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    reservation = reservations.release(db, current_user, reservation_id)
+    return compact(reservation, RESERVATION_COLUMNS)
+
+
+# ================= TOKENS =================
+# Tokens are issued from a logged-in browser session and shown only once.
+@router.get("/tokens")
+def list_tokens(
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    tokens = (
+        db.query(ApiToken)
+        .filter(ApiToken.user_id == current_user.id)
+        .order_by(ApiToken.created_at.desc())
+        .all()
+    )
+    return {
+        "data": [
+            compact(t, ("id", "name", "is_active", "created_at", "last_used_at"))
+            for t in tokens
+        ]
+    }
+
+
+@router.post("/tokens", status_code=201)
+def create_token(
+    payload: TokenIn,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    token = generate_api_token()
+
+    api_token = ApiToken(
+        user_id=current_user.id,
+        name=payload.name,
+        token_hash=hash_api_token(token)
+    )
+    db.add(api_token)
+    db.commit()
+
+    return {"id": api_token.id, "name": api_token.name, "token": token}
+
+
+@router.delete("/tokens/{token_id}", status_code=204)
+def revoke_token(
+    token_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    api_token = db.query(ApiToken).filter(
+        ApiToken.id == token_id,
+        ApiToken.user_id == current_user.id
+    ).first()
+    if not api_token:
+        raise HTTPException(status_code=404, detail="Token not found")
+
+    api_token.is_active = False
+    db.commit()
+
+    return Response(status_code=204)
@@ -0,0 +1,166 @@
+from urllib.parse import quote
+
+from fastapi import APIRouter, Request, Depends, Form, UploadFile, File, HTTPException
+from fastapi.responses import RedirectResponse
+from sqlalchemy.orm import Session
+
+from app.core.audit import set_actor
+from app.core.dependencies import get_db, require_login
+from app.models.cycle_count import CycleCount
+from app.models.user import User
+from app.services import cyclecount
+
+router = APIRouter(prefix="/counts")
+
+RECENT_COUNTS = 20
+
+
+# =========================
+# GET: Cycle counts
+# =========================
+@router.get("")
+def counts_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    counts = (
+        db.query(CycleCount, User.name)
+        .join(User, User.id == CycleCount.created_by)
+        .order_by(CycleCount.status != "open", CycleCount.id.desc())
+        .limit(RECENT_COUNTS)
+        .all()
+    )
+
+    return request.app.state.templates.TemplateResponse(
+        "pages/counts.html",
+        {
+            "request": request,
+            "current_user": current_user,
+            "counts": counts
+        }
+    )
+
+
+@router.post("/start")
+def start_count(
+    rack: str = Form(...),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    count = cyclecount.start_count(db, current_user, rack)
+
+    return RedirectResponse(f"/counts/{count.id}", status_code=303)
+
+
+# =========================
+# GET: Review one count
+# =========================
+@router.get("/{count_id}")
+def count_page(
+    count_id: int,
+    request: Request,
+    location: str = "",
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    count = cyclecount.get_count(db, count_id)
+    variances = cyclecount.variances(db, count)
+    uncounted, uncounted_bins = cyclecount.uncounted_bins(db, count)
+
+    return request.app.state.templates.TemplateResponse(
+        "pages/count.html",
+        {
+            "request": request,
+            "current_user": current_user,
+            "count": count,
+            "summary": cyclecount.summary(db, count),
+            "variances": variances,
+            # Applying is refused while any bin would go below zero
+            "below_zero": sum(1 for _, _, current, variance in variances if current + variance < 0),
+            "uncounted": uncounted,
+            "uncounted_bins": uncounted_bins,
+            "location": location
+        }
+    )
+
+
+# =========================
+# POST: Record counted quantities
+# =========================
+@router.post("/{count_id}/upload")
+async def upload_counts(
+    count_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    count = cyclecount.get_count(db, count_id)
+    rows = cyclecount.parse_count_csv(await file.read(), count.rack)
+    cyclecount.record_counts(db, count.id, rows)
+
+    return RedirectResponse(f"/counts/{count.id}", status_code=303)
+
+
+@router.post("/{count_id}/scan")
+def scan_count(
+    count_id: int,
+    part_no: str = Form(...),
+    location: str = Form(""),
+    counted: int = Form(...),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    cyclecount.record_counts(db, count_id, [(part_no.strip(), location, counted)])
+
+    # Keep the location for the next scan in the same bin row
+    return RedirectResponse(f"/counts/{count_id}?location={quote(location.strip())}", status_code=303)
+
+
+# =========================
+# POST: Apply / cancel
+# =========================
+@router.post("/{count_id}/apply")
+def apply_count(
+    count_id: int,
+    reason: str = Form(...),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    set_actor(db, current_user)
+
+    cyclecount.apply_count(db, count_id, current_user, reason)
+
+    return RedirectResponse(f"/counts/{count_id}", status_code=303)
+
+
+@router.post("/{count_id}/cancel")
+def cancel_count(
+    count_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    cyclecount.cancel_count(db, count_id)
+
+    return RedirectResponse("/counts", status_code=303)
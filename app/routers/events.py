@@ -0,0 +1,46 @@
+import json
+
+from fastapi import APIRouter, Request, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.dependencies import require_login
+from app.core.events import get_broker
+
+router = APIRouter(prefix="/events")
+
+HEARTBEAT_SECONDS = 15
+
+
+@router.get("/stock")
+async def stock_feed(
+    request: Request,
+    ids: str | None = Query(None),
+    current_user = Depends(require_login)
+):
+    """
+    Server-sent events with quantity deltas for components.
+    Pages pass the ids they display to only receive relevant rows.
+    """
+    wanted = {int(i) for i in ids.split(",") if i.strip().isdigit()} if ids else None
+
+    sub = get_broker().subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                event = await sub.get(timeout=HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                if wanted is not None and event["id"] not in wanted:
+                    continue
+                yield f"data: {json.dumps(event, separators=(',', ':'))}\n\n"
+        finally:
+            sub.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
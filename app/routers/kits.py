@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Request, Depends, Form, HTTPException
+from fastapi.responses import RedirectResponse
+from sqlalchemy.orm import Session
+
+from app.core.dependencies import get_db, require_login
+from app.models.kit import Kit
+from app.services import kits
+
+router = APIRouter(prefix="/kits")
+
+
+# =========================
+# GET: Kit planning
+# =========================
+@router.get("")
+def kits_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    all_kits = db.query(Kit).order_by(Kit.name).all()
+
+    # Two queries whatever the number of kits
+    buildable = kits.buildable_counts(db)
+    lines = kits.kit_lines(db)
+
+    return request.app.state.templates.TemplateResponse(
+        "pages/kits.html",
+        {
+            "request": request,
+            "current_user": current_user,
+            "kits": all_kits,
+            "buildable": buildable,
+            "lines": lines,
+            "max_count": kits.MAX_KITS_PER_BORROW
+        }
+    )
+
+
+# =========================
+# POST: Borrow a kit
+# =========================
+@router.post("/{kit_id}/borrow")
+def borrow_kit(
+    kit_id: int,
+    count: int = Form(1),
+    remarks: str | None = Form(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    kits.borrow_kit(db, current_user, kit_id, count, remarks)
+
+    return RedirectResponse("/return", status_code=303)
+
+
+# =========================
+# Admin: define kits
+# =========================
+@router.post("/create")
+def create_kit(
+    name: str = Form(...),
+    description: str | None = Form(None),
+    items: str = Form(...),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    kits.create_kit(db, name, description, kits.parse_lines(items))
+
+    return RedirectResponse("/kits", status_code=303)
+
+
+@router.post("/{kit_id}/delete")
+def delete_kit(
+    kit_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    kits.delete_kit(db, kit_id)
+
+    return RedirectResponse("/kits", status_code=303)
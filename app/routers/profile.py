@@ -1,24 +1,16 @@
 from fastapi import APIRouter, Request, Depends, Form, HTTPException
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 
+from app.core.audit import set_actor
 from app.core.database import SessionLocal
 from app.core.dependencies import require_login
+from app.core.security import hash_password, verify_password
+from app.core.sessions import revoke_user_sessions, rotate_session
 from app.models.user import User
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def verify_password(plain, hashed):
-    return pwd_context.verify(plain, hashed)
-
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
 
 def get_db():
     db = SessionLocal()
@@ -70,8 +62,13 @@ def change_own_password(
 
     user = db.query(User).filter(User.id == current_user.id).first()
     user.password_hash = hash_password(new_password)
+    set_actor(db, current_user)
     db.commit()
 
+    # Log out every other session; this one continues under a new id
+    revoke_user_sessions(user.id)
+    rotate_session(request.session)
+
     request.session["success"] = "Password updated successfully."
     return RedirectResponse("/profile", status_code=303)
 
@@ -100,6 +97,7 @@ def update_profile(
     user = db.query(User).filter(User.id == current_user.id).first()
     user.name = name
     user.employee_id = employee_id
+    set_actor(db, current_user)
     db.commit()
 
     request.session["success"] = "Profile updated successfully."
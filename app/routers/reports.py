@@ -1,18 +1,36 @@
-from fastapi import APIRouter, Request, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Request, Depends, HTTPException, Form
+from fastapi.responses import StreamingResponse, RedirectResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime
 from io import BytesIO
-from openpyxl import Workbook
 
+from app.core import audit
 from app.core.database import SessionLocal
-from app.core.dependencies import require_login
+from app.core.dependencies import get_report_db, require_login
+from app.core.replica import REPORT_MAX_AGE
 from app.models.component import Component
+from app.models.forecast import Forecast
 from app.models.request import Request as RequestModel
 from app.models.user import User
+from app.models.loan_period import LoanPeriod
+from app.models.outbox import OutboxMessage
+from app.services import forecast
+from app.services.archive import request_history
+from app.services.loans import DEFAULT_LOAN_DAYS, overdue_query
 
 router = APIRouter(prefix="/reports")
 
+OVERDUE_PAGE_SIZE = 50
+AUDIT_PAGE_SIZE = 100
+FORECAST_PAGE_SIZE = 50
+
+
+def workbook(**options):
+    # openpyxl is slow to import; only exports should pay for it
+    from openpyxl import Workbook
+    return Workbook(**options)
+
 
 def get_db():
     db = SessionLocal()
@@ -35,7 +53,8 @@ def reports_page(
         "pages/reports.html",
         {
             "request": request,
-            "current_user": current_user
+            "current_user": current_user,
+            "report_max_age": REPORT_MAX_AGE
         }
     )
 
@@ -43,15 +62,20 @@ def reports_page(
 # ================= COMPONENT EXCEL =================
 @router.get("/components/excel")
 def export_components_excel(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user = Depends(require_login)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    components = db.query(Component).order_by(Component.category, Component.part_no).all()
+    components = (
+        db.query(Component)
+        .filter(Component.deleted_at.is_(None))
+        .order_by(Component.category, Component.part_no)
+        .all()
+    )
 
-    wb = Workbook()
+    wb = workbook()
     ws = wb.active
     ws.title = "Components"
 
@@ -93,21 +117,25 @@ def export_components_excel(
 # ================= TRANSACTION EXCEL =================
 @router.get("/transactions/excel")
 def export_transactions_excel(
-    db: Session = Depends(get_db),
+    include_archive: bool = False,
+    db: Session = Depends(get_report_db),
     current_user = Depends(require_login)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
+    # Archived requests are only read when asked for
+    history = request_history(include_archive)
+
     transactions = (
-        db.query(RequestModel, Component, User)
-        .join(Component, RequestModel.component_id == Component.id)
-        .join(User, RequestModel.user_id == User.id)
-        .order_by(RequestModel.requested_at.desc())
+        db.query(history, Component, User)
+        .join(Component, history.component_id == Component.id)
+        .join(User, history.user_id == User.id)
+        .order_by(history.requested_at.desc())
         .all()
     )
 
-    wb = Workbook()
+    wb = workbook()
     ws = wb.active
     ws.title = "Transactions"
 
@@ -142,3 +170,290 @@ def export_transactions_excel(
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
+
+
+# ================= OVERDUE LOANS =================
+@router.get("/overdue")
+def overdue_page(
+    request: Request,
+    page: int = 1,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    now = datetime.utcnow()
+    query = overdue_query(db, now)
+
+    total = query.count()
+    total_pages = max(1, (total + OVERDUE_PAGE_SIZE - 1) // OVERDUE_PAGE_SIZE)
+    page = max(1, min(page, total_pages))
+
+    # Page the ids off the (status, due_at) index first, then join details
+    ids = [
+        r.id for r in
+        query.with_entities(RequestModel.id)
+        .order_by(RequestModel.due_at, RequestModel.id)
+        .offset((page - 1) * OVERDUE_PAGE_SIZE)
+        .limit(OVERDUE_PAGE_SIZE)
+        .all()
+    ]
+
+    loans = (
+        db.query(RequestModel, Component, User)
+        .join(Component, RequestModel.component_id == Component.id)
+        .join(User, RequestModel.user_id == User.id)
+        .filter(RequestModel.id.in_(ids))
+        .order_by(RequestModel.due_at, RequestModel.id)
+        .all()
+    ) if ids else []
+
+    reminded = {
+        r.request_id for r in
+        db.query(OutboxMessage.request_id)
+        .filter(
+            OutboxMessage.kind == "overdue_reminder",
+            OutboxMessage.request_id.in_(ids)
+        )
+        .all()
+    } if ids else set()
+
+    periods = db.query(LoanPeriod).order_by(LoanPeriod.category).all()
+
+    return request.app.state.templates.TemplateResponse(
+        "pages/overdue.html",
+        {
+            "request": request,
+            "current_user": current_user,
+            "loans": loans,
+            "reminded": reminded,
+            "now": now,
+            "total": total,
+            "page": page,
+            "total_pages": total_pages,
+            "periods": periods,
+            "default_days": DEFAULT_LOAN_DAYS
+        }
+    )
+
+
+@router.get("/overdue/excel")
+def export_overdue_excel(
+    db: Session = Depends(get_report_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    now = datetime.utcnow()
+    loans = (
+        overdue_query(db, now)
+        .with_entities(RequestModel, Component, User)
+        .join(Component, RequestModel.component_id == Component.id)
+        .join(User, RequestModel.user_id == User.id)
+        .order_by(RequestModel.due_at)
+        .all()
+    )
+
+    wb = workbook(write_only=True)
+    ws = wb.create_sheet("Overdue")
+
+    ws.append([
+        "Request ID", "Category", "Part No", "Description",
+        "Borrowed By", "Employee ID",
+        "Quantity", "Borrowed At", "Due At", "Days Overdue"
+    ])
+
+    for r, c, u in loans:
+        ws.append([
+            r.id,
+            c.category,
+            c.part_no,
+            c.description,
+            u.name,
+            u.employee_id,
+            r.quantity,
+            r.requested_at.strftime("%Y-%m-%d %H:%M") if r.requested_at else "",
+            r.due_at.strftime("%Y-%m-%d %H:%M"),
+            (now - r.due_at).days
+        ])
+
+    stream = BytesIO()
+    wb.save(stream)
+    stream.seek(0)
+
+    filename = f"overdue_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+    return StreamingResponse(
+        stream,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.post("/loan-periods")
+def save_loan_period(
+    category: str = Form(...),
+    days: int = Form(...),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="Invalid loan period")
+
+    period = db.query(LoanPeriod).filter(LoanPeriod.category == category).first()
+    if period:
+        period.days = days
+    else:
+        db.add(LoanPeriod(category=category, days=days))
+
+    db.commit()
+    return RedirectResponse("/reports/overdue", status_code=303)
+
+
+@router.post("/loan-periods/delete")
+def delete_loan_period(
+    category: str = Form(...),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    db.query(LoanPeriod).filter(LoanPeriod.category == category).delete()
+    db.commit()
+
+    return RedirectResponse("/reports/overdue", status_code=303)
+
+
+# ================= AUDIT LOG =================
+def parse_date(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+
+
+@router.get("/audit")
+def audit_page(
+    request: Request,
+    entity: str | None = None,
+    entity_id: str | None = None,
+    actor_id: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    before: str | None = None,
+    before_id: str | None = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    end_at = parse_date(end)
+    if end_at and len(end) == 10:
+        # A bare date means the whole day
+        end_at = end_at.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+    entries = audit.search(
+        entity=entity or None,
+        entity_id=int(entity_id) if entity_id and entity_id.isdigit() else None,
+        actor_id=int(actor_id) if actor_id and actor_id.isdigit() else None,
+        start=parse_date(start),
+        end=end_at,
+        before=parse_date(before),
+        before_id=int(before_id) if before_id and before_id.isdigit() else None,
+        limit=AUDIT_PAGE_SIZE
+    )
+
+    users = db.query(User).order_by(User.name).all()
+
+    next_url = None
+    if len(entries) == AUDIT_PAGE_SIZE:
+        next_url = request.url.include_query_params(
+            before=entries[-1]["ts"].isoformat(),
+            before_id=entries[-1]["id"]
+        )
+
+    return request.app.state.templates.TemplateResponse(
+        "pages/audit.html",
+        {
+            "request": request,
+            "current_user": current_user,
+            "entries": entries,
+            "users": users,
+            "user_names": {u.id: u.name for u in users},
+            "entities": sorted(t.__tablename__ for t in audit.AUDITED),
+            "next_url": next_url,
+            "filters": {
+                "entity": entity or "",
+                "entity_id": entity_id or "",
+                "actor_id": actor_id or "",
+                "start": start or "",
+                "end": end or ""
+            }
+        }
+    )
+
+
+# ================= REORDER FORECAST =================
+@router.get("/forecast")
+def forecast_page(
+    request: Request,
+    page: int = 1,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    # Precomputed by the forecast job; reads one row per part
+    query = db.query(Forecast).filter(Forecast.reorder_quantity > 0)
+
+    total = query.count()
+    total_pages = max(1, (total + FORECAST_PAGE_SIZE - 1) // FORECAST_PAGE_SIZE)
+    page = max(1, min(page, total_pages))
+
+    rows = (
+        query.with_entities(Forecast, Component)
+        .join(Component, Forecast.component_id == Component.id)
+        .order_by(Forecast.days_remaining, Forecast.component_id)
+        .offset((page - 1) * FORECAST_PAGE_SIZE)
+        .limit(FORECAST_PAGE_SIZE)
+        .all()
+    )
+
+    computed_at = db.query(func.max(Forecast.computed_at)).scalar()
+
+    return request.app.state.templates.TemplateResponse(
+        "pages/forecast.html",
+        {
+            "request": request,
+            "current_user": current_user,
+            "rows": rows,
+            "total": total,
+            "page": page,
+            "total_pages": total_pages,
+            "computed_at": computed_at,
+            "lead_days": forecast.LEAD_TIME_DAYS,
+            "cover_days": forecast.COVER_DAYS
+        }
+    )
+
+
+@router.post("/forecast/refresh")
+def refresh_forecast(
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    forecast.compute_forecasts()
+
+    return RedirectResponse("/reports/forecast", status_code=303)
@@ -3,12 +3,18 @@ from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from math import ceil
 from fastapi import Query
-
+from sqlalchemy import select
 
 from app.core.dependencies import require_login
 from app.core.database import SessionLocal
 from app.models.component import Component
 from app.models.request import Request as RequestModel
+from app.models.stock_location import StockLocation
+from app.services.facets import facet_index, facet_links, filter_facets, selected_facets
+from app.services.fuzzy import did_you_mean
+from app.services.inventory import borrow_component, held_quantities
+from app.services.locations import location_label, locations_for
+from app.services.reservations import DEFAULT_HOLD_HOURS
 
 router = APIRouter()
 
@@ -35,10 +41,15 @@ def request_page(
     part_no: str | None = Query(None),
     rack: str | None = Query(None),
 
+    f_category: str | None = Query(None),
+    f_rack: str | None = Query(None),
+    f_location: str | None = Query(None),
+    f_type: str | None = Query(None),
+
     db: Session = Depends(get_db),
     current_user = Depends(require_login)
 ):
-    query = db.query(Component)
+    query = db.query(Component).filter(Component.deleted_at.is_(None))
 
     if category:
         query = query.filter(Component.category.ilike(f"%{category}%"))
@@ -47,7 +58,19 @@ def request_page(
     if part_no:
         query = query.filter(Component.part_no.ilike(f"%{part_no}%"))
     if rack:
-        query = query.filter(Component.rack.ilike(f"%{rack}%"))
+        query = query.filter(Component.id.in_(
+            select(StockLocation.component_id).where(StockLocation.rack.ilike(f"%{rack}%"))
+        ))
+
+    # Facet counts come from the in-memory index, narrowed by any text filters
+    selected = selected_facets(
+        category=f_category, rack=f_rack, location=f_location, type=f_type
+    )
+    text_filtered = any((category, description, part_no, rack))
+    restrict = {cid for (cid,) in query.with_entities(Component.id)} if text_filtered else None
+    facets = facet_links(request, facet_index.counts(db, selected, restrict), selected)
+
+    query = filter_facets(query, selected)
 
     total = query.count()
     total_pages = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
@@ -62,12 +85,32 @@ def request_page(
         .all()
     )
 
+    # Near misses on a mistyped part number or description
+    suggestions = [] if total else did_you_mean(request, db, part_no or description)
+
+    # Units on hold aren't available to borrow
+    ids = [c.id for c in components]
+    held = held_quantities(db, ids)
+    locations = {
+        cid: [
+            {"id": loc.id, "label": location_label(loc), "quantity": loc.quantity}
+            for loc in locs
+        ]
+        for cid, locs in locations_for(db, ids).items()
+    }
+
     return request.app.state.templates.TemplateResponse(
         "pages/request.html",
         {
             "request": request,
             "current_user": current_user,
             "components": components,
+            "held": held,
+            "locations": locations,
+            "facets": facets,
+            "selected_facets": selected,
+            "suggestions": suggestions,
+            "hold_hours": DEFAULT_HOLD_HOURS,
             "page": page,
             "total_pages": total_pages,
             "filters": {
@@ -90,31 +133,10 @@ def create_request(
     component_id: int = Form(...),
     quantity: int = Form(...),
     remarks: str | None = Form(None),
+    location_id: int | None = Form(None),
     db: Session = Depends(get_db),
     current_user = Depends(require_login)
 ):
-    if quantity <= 0:
-        raise HTTPException(status_code=400)
-
-    component = db.query(Component).filter(Component.id == component_id).first()
-    if not component:
-        raise HTTPException(status_code=404)
-
-    if quantity > component.quantity:
-        raise HTTPException(status_code=400)
-
-    component.quantity -= quantity
-
-    req = RequestModel(
-        user_id=current_user.id,
-        component_id=component.id,
-        quantity=quantity,
-        status="borrowed",
-        remarks=remarks
-    )
-
-
-    db.add(req)
-    db.commit()
+    borrow_component(db, current_user, component_id, quantity, remarks, location_id)
 
     return RedirectResponse("/request", status_code=303)
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Request, Depends, Form
+from fastapi.responses import RedirectResponse
+from sqlalchemy.orm import Session
+from datetime import datetime
+
+from app.core.dependencies import get_db, require_login
+from app.models.component import Component
+from app.models.reservation import Reservation
+from app.models.user import User
+from app.services import reservations
+
+router = APIRouter(prefix="/reservations")
+
+
+@router.get("")
+def reservations_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    query = (
+        db.query(Reservation, Component, User)
+        .join(Component, Reservation.component_id == Component.id)
+        .join(User, Reservation.user_id == User.id)
+        .filter(
+            Reservation.status == "active",
+            Reservation.expires_at > datetime.utcnow()
+        )
+    )
+
+    if current_user.role != "admin":
+        query = query.filter(Reservation.user_id == current_user.id)
+
+    holds = query.order_by(Reservation.expires_at).all()
+
+    return request.app.state.templates.TemplateResponse(
+        "pages/reservations.html",
+        {
+            "request": request,
+            "current_user": current_user,
+            "holds": holds
+        }
+    )
+
+
+@router.post("/create")
+def create_reservation(
+    component_id: int = Form(...),
+    quantity: int = Form(...),
+    hours: int = Form(reservations.DEFAULT_HOLD_HOURS),
+    remarks: str | None = Form(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    reservations.reserve(db, current_user, component_id, quantity, hours, remarks)
+
+    return RedirectResponse("/reservations", status_code=303)
+
+
+@router.post("/{reservation_id}/convert")
+def convert_reservation(
+    reservation_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    reservations.convert(db, current_user, reservation_id)
+
+    return RedirectResponse("/reservations", status_code=303)
+
+
+@router.post("/{reservation_id}/release")
+def release_reservation(
+    reservation_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    reservations.release(db, current_user, reservation_id)
+
+    return RedirectResponse("/reservations", status_code=303)
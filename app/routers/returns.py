@@ -6,6 +6,7 @@ from app.core.dependencies import require_login
 from app.models.request import Request as RequestModel
 from app.models.component import Component
 from app.models.user import User
+from app.services.inventory import return_request
 
 from fastapi import Form, HTTPException
 from fastapi.responses import RedirectResponse
@@ -42,7 +43,8 @@ def return_page(
         {
             "request": request,
             "current_user": current_user,
-            "borrowed_items": borrowed_items
+            "borrowed_items": borrowed_items,
+            "now": datetime.utcnow()
         }
     )
 
@@ -53,39 +55,7 @@ def confirm_return(
     db: Session = Depends(get_db),
     current_user = Depends(require_login)
 ):
-    req = db.query(RequestModel).filter(RequestModel.id == request_id).first()
-
-    if not req:
-        raise HTTPException(status_code=404, detail="Request not found")
-
-    if req.status != "borrowed":
-        raise HTTPException(status_code=400, detail="Request already returned")
-
-    # Permission check
-    if current_user.role != "admin" and req.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not allowed")
-
-    if return_qty <= 0:
-        raise HTTPException(status_code=400, detail="Invalid return quantity")
-
-    if return_qty > req.quantity:
-        raise HTTPException(
-            status_code=400,
-            detail="Return quantity exceeds borrowed quantity"
-        )
-
-    component = db.query(Component).filter(Component.id == req.component_id).first()
-    if not component:
-        raise HTTPException(status_code=404, detail="Component not found")
-
-    # Stock update
-    component.quantity += return_qty
-
-    # Full return only (for now)
-    req.status = "returned"
-    req.returned_at = datetime.utcnow()
-
-    db.commit()
+    return_request(db, current_user, request_id, return_qty)
 
     return RedirectResponse("/return", status_code=303)
 
@@ -0,0 +1,224 @@
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.assets import asset_url
+from app.core.dependencies import get_db, require_login, require_api_user
+from app.models.component import Component
+from app.models.request import Request as RequestModel
+from app.models.stock_location import StockLocation
+from app.services import barcodes, inventory
+
+router = APIRouter(prefix="/scan")
+
+# Labels for parts whose part_no can't be encoded carry the component id instead
+ID_PREFIX = "#"
+
+MAX_LABELS = 1000
+
+
+class ScanIn(BaseModel):
+    code: str
+    action: str = "borrow"
+    # Borrows default to one; a return always closes the whole open loan
+    quantity: int | None = None
+    remarks: str | None = None
+
+
+def label_code(component: Component) -> str:
+    if component.part_no and barcodes.can_encode(component.part_no):
+        return component.part_no
+    return f"{ID_PREFIX}{component.id}"
+
+
+def resolve_code(db: Session, code: str) -> Component:
+    """
+    Resolve a scanned code to its component: exact part_no first (unique
+    index), then the `#<id>` form printed on labels. Bare numbers are not
+    ids, so a stray EAN or mistyped part_no doesn't hit some other part.
+    Old labels of deleted parts don't resolve.
+    """
+    code = code.strip()
+    if not code:
+        raise HTTPException(status_code=400, detail="Empty code")
+
+    live = db.query(Component).filter(Component.deleted_at.is_(None))
+
+    component = live.filter(Component.part_no == code).first()
+    if component:
+        return component
+
+    raw_id = code[len(ID_PREFIX):]
+    if code.startswith(ID_PREFIX) and raw_id.isdigit():
+        component = live.filter(Component.id == int(raw_id)).first()
+        if component:
+            return component
+
+    raise HTTPException(status_code=404, detail="Unknown code")
+
+
+def scan_result(component: Component, req: RequestModel | None = None) -> dict:
+    result = {
+        "component": {
+            "id": component.id,
+            "category": component.category,
+            "description": component.description,
+            "part_no": component.part_no,
+            "rack": component.rack,
+            "location": component.location,
+            "quantity": component.quantity,
+            "image_path": component.image_path,
+            "image_url": asset_url(component.image_path) if component.image_path else None
+        }
+    }
+    if req:
+        result["request"] = {
+            "id": req.id,
+            "quantity": req.quantity,
+            "status": req.status
+        }
+    return result
+
+
+# ================= SCAN PAGE =================
+@router.get("")
+def scan_page(
+    request: Request,
+    current_user = Depends(require_login)
+):
+    return request.app.state.templates.TemplateResponse(
+        "pages/scan.html",
+        {
+            "request": request,
+            "current_user": current_user
+        }
+    )
+
+
+# ================= LABELS =================
+@router.get("/labels")
+def labels_page(
+    request: Request,
+    ids: str | None = Query(None),
+    category: str | None = Query(None),
+    rack: str | None = Query(None),
+    location: str | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    # One label per bin, printed with that bin's rack and location
+    query = (
+        db.query(Component, StockLocation)
+        .join(StockLocation, StockLocation.component_id == Component.id)
+        .filter(Component.deleted_at.is_(None))
+    )
+
+    if ids:
+        try:
+            id_list = [int(i) for i in ids.split(",") if i.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid ids")
+        query = query.filter(Component.id.in_(id_list))
+    if category:
+        query = query.filter(Component.category == category)
+    if rack:
+        query = query.filter(StockLocation.rack == rack.strip())
+    if location:
+        query = query.filter(StockLocation.location.ilike(f"{location.strip()}%"))
+
+    rows = (
+        query
+        .order_by(StockLocation.rack, StockLocation.location, Component.part_no)
+        .limit(MAX_LABELS)
+        .all()
+    )
+
+    svgs = {}
+    labels = []
+    for c, place in rows:
+        code = label_code(c)
+        if code not in svgs:
+            svgs[code] = barcodes.svg(code)
+        labels.append({"component": c, "place": place, "code": code, "svg": svgs[code]})
+
+    return request.app.state.templates.TemplateResponse(
+        "pages/scan_labels.html",
+        {
+            "request": request,
+            "current_user": current_user,
+            "labels": labels
+        }
+    )
+
+
+@router.get("/labels/{component_id}.svg")
+def label_svg(
+    component_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    component = inventory.get_component(db, component_id)
+
+    return Response(
+        barcodes.svg(label_code(component)),
+        media_type="image/svg+xml"
+    )
+
+
+# ================= LOOKUP / BORROW / RETURN =================
+@router.get("/lookup")
+def lookup(
+    code: str,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    return scan_result(resolve_code(db, code))
+
+
+@router.post("")
+def scan(
+    payload: ScanIn,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_api_user)
+):
+    component = resolve_code(db, payload.code)
+
+    if payload.action == "lookup":
+        return scan_result(component)
+
+    if payload.action == "borrow":
+        req = inventory.borrow_component(
+            db, current_user, component.id,
+            1 if payload.quantity is None else payload.quantity,
+            payload.remarks
+        )
+        return scan_result(component, req)
+
+    if payload.action == "return":
+        # Return the scanner's oldest open loan of this part
+        open_req = (
+            db.query(RequestModel)
+            .filter(
+                RequestModel.user_id == current_user.id,
+                RequestModel.component_id == component.id,
+                RequestModel.status == "borrowed"
+            )
+            .order_by(RequestModel.requested_at)
+            .first()
+        )
+        if not open_req:
+            raise HTTPException(status_code=404, detail="No open loan for this part")
+        if payload.quantity is not None and payload.quantity != open_req.quantity:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Quantity doesn't match the open loan of {open_req.quantity}"
+            )
+
+        req = inventory.return_request(db, current_user, open_req.id, open_req.quantity)
+        return scan_result(component, req)
+
+    raise HTTPException(status_code=400, detail="Unknown action")
@@ -2,15 +2,22 @@ import os
 import shutil
 import re
 from fastapi import APIRouter, Request, Depends, Form, UploadFile, File, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from fastapi.responses import RedirectResponse
 from fastapi import Query
 from fastapi.responses import HTMLResponse
 
+from app.core.audit import set_actor
 from app.core.dependencies import require_login, require_admin
 from app.core.database import SessionLocal
 from app.models.component import Component
+from app.models.stock_location import StockLocation
+from app.services import inventory, locations
+from app.services.facets import facet_index, facet_links, filter_facets, selected_facets
+from app.services.fuzzy import did_you_mean
+from app.services.parametric import filter_parametric
 
 router = APIRouter()
 
@@ -44,34 +51,63 @@ def stock_page(
     size: str | None = Query(None),
     voltage: str | None = Query(None),
     watt: str | None = Query(None),
+    type: str | None = Query(None),
     part_no: str | None = Query(None),
     rack: str | None = Query(None),
     location: str | None = Query(None), 
+    f_category: str | None = Query(None),
+    f_rack: str | None = Query(None),
+    f_location: str | None = Query(None),
+    f_type: str | None = Query(None),
+    deleted: bool = Query(False),
     db: Session = Depends(get_db),
     current_user = Depends(require_login)
 ):
-    query = db.query(Component)
+    # Deleted components are only listed (for restoring) when an admin asks
+    deleted = deleted and current_user.role == "admin"
+    if deleted:
+        query = db.query(Component).filter(Component.deleted_at.isnot(None))
+    else:
+        query = db.query(Component).filter(Component.deleted_at.is_(None))
 
     if category:
         query = query.filter(Component.category.ilike(f"%{category}%"))
     if description:
         query = query.filter(Component.description.ilike(f"%{description}%"))
+    # value/voltage/watt accept "9k-11k", ">=0.5W" or "10k" as numeric ranges
     if value:
-        query = query.filter(Component.value.ilike(f"%{value}%"))
+        query = filter_parametric(query, "value", value)
     if size:
         query = query.filter(Component.size.ilike(f"%{size}%"))
     if voltage:
-        query = query.filter(Component.voltage.ilike(f"%{voltage}%"))
+        query = filter_parametric(query, "voltage", voltage)
     if watt:
-        query = query.filter(Component.watt.ilike(f"%{watt}%"))
+        query = filter_parametric(query, "watt", watt)
+    if type:
+        query = query.filter(Component.type.ilike(f"%{type}%"))
     if part_no:
         query = query.filter(Component.part_no.ilike(f"%{part_no}%"))
     if rack:
-        query = query.filter(Component.rack.ilike(f"%{rack}%"))
+        query = query.filter(Component.id.in_(
+            select(StockLocation.component_id).where(StockLocation.rack.ilike(f"%{rack}%"))
+        ))
     if location:
-        query = query.filter(Component.location.ilike(f"%{location}%"))
+        query = query.filter(Component.id.in_(
+            select(StockLocation.component_id).where(StockLocation.location.ilike(f"%{location}%"))
+        ))
 
-    components = query.all()
+    # Facet counts come from the in-memory index, narrowed by any text filters
+    selected = selected_facets(
+        category=f_category, rack=f_rack, location=f_location, type=f_type
+    )
+    text_filtered = any((category, description, value, size, voltage, watt, type, part_no, rack, location))
+    restrict = {cid for (cid,) in query.with_entities(Component.id)} if text_filtered else None
+    facets = {} if deleted else facet_links(request, facet_index.counts(db, selected, restrict), selected)
+
+    components = filter_facets(query, selected).all()
+
+    # Near misses on a mistyped part number or description
+    suggestions = [] if components else did_you_mean(request, db, part_no or description)
 
     return request.app.state.templates.TemplateResponse(
         "pages/stock.html",
@@ -79,6 +115,10 @@ def stock_page(
             "request": request,
             "current_user": current_user,
             "components": components,
+            "facets": facets,
+            "selected_facets": selected,
+            "suggestions": suggestions,
+            "show_deleted": deleted,
             "filters": {
                 "category": category or "",
                 "description": description or "",
@@ -86,6 +126,7 @@ def stock_page(
                 "size": size or "",
                 "voltage": voltage or "",
                 "watt": watt or "",
+                "type": type or "",
                 "part_no": part_no or "",
                 "rack": rack or "",
                 "location": location or "" 
@@ -117,10 +158,10 @@ def add_component(
     if current_user.role != "admin":
         raise HTTPException(status_code=403)
 
+    set_actor(db, current_user)
+
     # Check duplicate part no
-    existing = db.query(Component).filter(Component.part_no == part_no).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Part No already exists")
+    inventory.ensure_unique_part_no(db, part_no)
 
     image_path = None
 
@@ -140,7 +181,8 @@ def add_component(
 
         image_path = f"uploads/components/{filename}"
 
-    component = Component(
+    inventory.create_component(
+        db,
         category=category,
         description=description,
         value=value,
@@ -155,11 +197,6 @@ def add_component(
         image_path=image_path
     )
 
-    from fastapi.responses import RedirectResponse
-
-    db.add(component)
-    db.commit()
-
     return RedirectResponse("/stock", status_code=303)
 
 @router.post("/stock/edit/{component_id}")
@@ -184,22 +221,16 @@ def edit_component(
     if current_user.role != "admin":
         raise HTTPException(status_code=403)
 
-    component = db.query(Component).filter(Component.id == component_id).first()
+    set_actor(db, current_user)
+
+    component = db.query(Component).filter(
+        Component.id == component_id,
+        Component.deleted_at.is_(None)
+    ).first()
     if not component:
         raise HTTPException(status_code=404)
 
-    # Update fields
-    component.category = category
-    component.description = description
-    component.value = value
-    component.size = size
-    component.voltage = voltage
-    component.watt = watt
-    component.type = type
-    component.part_no = part_no
-    component.rack = rack
-    component.location = location
-    component.quantity = quantity
+    inventory.ensure_unique_part_no(db, part_no, exclude_id=component.id)
 
     # Handle image replace
     if image:
@@ -224,7 +255,23 @@ def edit_component(
 
         component.image_path = f"uploads/components/{filename}"
 
-    db.commit()
+    # Update fields (keeps the per-location stock in step)
+    inventory.update_component(
+        db,
+        component,
+        category=category,
+        description=description,
+        value=value,
+        size=size,
+        voltage=voltage,
+        watt=watt,
+        type=type,
+        part_no=part_no,
+        rack=rack,
+        location=location,
+        quantity=quantity
+    )
+
     return RedirectResponse("/stock", status_code=303)
 
 @router.post("/stock/delete/{component_id}")
@@ -236,22 +283,36 @@ def delete_component(
     if current_user.role != "admin":
         raise HTTPException(status_code=403)
 
-    component = db.query(Component).filter(Component.id == component_id).first()
+    set_actor(db, current_user)
+
+    component = db.query(Component).filter(
+        Component.id == component_id,
+        Component.deleted_at.is_(None)
+    ).first()
     if not component:
         raise HTTPException(status_code=404)
 
-    # Delete image file
-    if component.image_path:
-        image_file = os.path.join("app/static", component.image_path)
-        if os.path.exists(image_file):
-            os.remove(image_file)
-
-    db.delete(component)
-    db.commit()
+    inventory.delete_component(db, component)
 
     return RedirectResponse("/stock", status_code=303)
 
 
+@router.post("/stock/restore/{component_id}")
+def restore_component(
+    component_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403)
+
+    set_actor(db, current_user)
+
+    inventory.restore_component(db, component_id)
+
+    return RedirectResponse("/stock?deleted=true", status_code=303)
+
+
 @router.get("/stock/edit/{component_id}", response_class=HTMLResponse)
 def edit_component_form(
     request: Request,
@@ -262,7 +323,10 @@ def edit_component_form(
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    component = db.query(Component).filter(Component.id == component_id).first()
+    component = db.query(Component).filter(
+        Component.id == component_id,
+        Component.deleted_at.is_(None)
+    ).first()
     if not component:
         raise HTTPException(status_code=404, detail="Component not found")
 
@@ -271,7 +335,27 @@ def edit_component_form(
         {
             "request": request,
             "component": component,
+            "locations": locations.locations_for(db, [component.id]).get(component.id, []),
             "current_user": current_user   # 👈 ADD THIS
         }
     )
 
+
+@router.post("/stock/transfer/{component_id}")
+def transfer_stock(
+    component_id: int,
+    from_location_id: int = Form(...),
+    to_rack: str = Form(None),
+    to_location: str = Form(None),
+    quantity: int = Form(...),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_login)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403)
+
+    set_actor(db, current_user)
+
+    locations.transfer(db, component_id, from_location_id, to_rack, to_location, quantity)
+
+    return RedirectResponse(f"/stock/edit/{component_id}", status_code=303)
@@ -2,19 +2,16 @@ from fastapi import APIRouter, Request, Depends, HTTPException
 from sqlalchemy.orm import Session
 from fastapi import Form
 from fastapi.responses import RedirectResponse
-from passlib.context import CryptContext
 
+from app.core.audit import set_actor
 from app.core.database import SessionLocal
 from app.core.dependencies import require_login
+from app.core.security import hash_password
+from app.core.sessions import revoke_user_sessions
 from app.models.user import User
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
 
 def get_db():
     db = SessionLocal()
@@ -71,6 +68,7 @@ def create_user(
     )
 
     db.add(new_user)
+    set_actor(db, current_user)
     db.commit()
 
     return RedirectResponse("/users", status_code=303)
@@ -93,7 +91,9 @@ def reset_password(
     
 
     user.password_hash = hash_password(new_password)
+    set_actor(db, current_user)
     db.commit()
+    revoke_user_sessions(user.id)
 
     return RedirectResponse("/users", status_code=303)
 
@@ -114,7 +114,9 @@ def disable_user(
         raise HTTPException(status_code=404, detail="User not found")
 
     user.is_active = False
+    set_actor(db, current_user)
     db.commit()
+    revoke_user_sessions(user.id)
 
     return RedirectResponse("/users", status_code=303)
 
@@ -132,6 +134,7 @@ def enable_user(
         raise HTTPException(status_code=404, detail="User not found")
 
     user.is_active = True
+    set_actor(db, current_user)
     db.commit()
 
     return RedirectResponse("/users", status_code=303)
@@ -187,6 +190,7 @@ def edit_user(
     user.employee_id = employee_id
     user.role = role
 
+    set_actor(db, current_user)
     db.commit()
 
     request.session["success"] = "User updated successfully."
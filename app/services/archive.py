@@ -0,0 +1,84 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import aliased
+
+from app.core.database import SessionLocal
+from app.models.request import Request as RequestModel, RequestLocation
+from app.models.request_archive import RequestArchive
+
+# Returned requests older than this move to requests_archive
+ARCHIVE_AFTER_MONTHS = int(os.getenv("INVENTORY_ARCHIVE_MONTHS", "12"))
+ARCHIVE_BATCH_SIZE = 500
+
+REQUEST_COLUMNS = (
+    "id", "user_id", "component_id", "location_id", "quantity", "status",
+    "requested_at", "due_at", "returned_at", "remarks"
+)
+
+
+def archive_cutoff(now: datetime | None = None) -> datetime:
+    return (now or datetime.utcnow()) - timedelta(days=30 * ARCHIVE_AFTER_MONTHS)
+
+
+def archive_returned_requests() -> int:
+    """
+    Move old returned requests to the archive table in batches, each batch
+    copied and deleted in one transaction. The newest request row is never
+    moved: SQLite hands out max(id) + 1, so keeping it stops archived ids
+    from being reused.
+    """
+    db = SessionLocal()
+    try:
+        cutoff = archive_cutoff()
+        newest_id = db.query(func.max(RequestModel.id)).scalar()
+        moved = 0
+
+        while True:
+            ids = [
+                r.id for r in
+                db.query(RequestModel.id)
+                .filter(
+                    RequestModel.status == "returned",
+                    RequestModel.returned_at < cutoff,
+                    RequestModel.id != newest_id
+                )
+                .limit(ARCHIVE_BATCH_SIZE)
+                .all()
+            ]
+            if not ids:
+                return moved
+
+            db.execute(
+                insert(RequestArchive).from_select(
+                    [*REQUEST_COLUMNS, "archived_at"],
+                    select(
+                        *[getattr(RequestModel, c) for c in REQUEST_COLUMNS],
+                        literal(datetime.utcnow())
+                    ).where(RequestModel.id.in_(ids))
+                )
+            )
+            db.execute(delete(RequestLocation).where(RequestLocation.request_id.in_(ids)))
+            db.execute(delete(RequestModel).where(RequestModel.id.in_(ids)))
+            db.commit()
+
+            moved += len(ids)
+    finally:
+        db.close()
+
+
+def request_history(include_archive: bool = False):
+    """
+    The request entity for history reports: live requests only, or live
+    and archived ones as a single UNION ALL.
+    """
+    if not include_archive:
+        return RequestModel
+
+    combined = union_all(
+        select(*[getattr(RequestModel, c) for c in REQUEST_COLUMNS]),
+        select(*[getattr(RequestArchive, c) for c in REQUEST_COLUMNS])
+    ).subquery("request_history")
+
+    return aliased(RequestModel, combined)
@@ -0,0 +1,75 @@
+"""
+Code 128 (subset B) barcodes rendered as inline SVG.
+
+Rack labels only need printable ASCII part numbers, so a small encoder
+keeps label printing free of image libraries.
+"""
+
+# Bar/space module widths for symbol values 0-106 (106 = stop)
+PATTERNS = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213",
+    "122312", "132212", "221213", "221312", "231212", "112232", "122132",
+    "122231", "113222", "123122", "123221", "223211", "221132", "221231",
+    "213212", "223112", "312131", "311222", "321122", "321221", "312212",
+    "322112", "322211", "212123", "212321", "232121", "111323", "131123",
+    "131321", "112313", "132113", "132311", "211313", "231113", "231311",
+    "112133", "112331", "132131", "113123", "113321", "133121", "313121",
+    "211331", "231131", "213113", "213311", "213131", "311123", "311321",
+    "331121", "312113", "312311", "332111", "314111", "221411", "431111",
+    "111224", "111422", "121124", "121421", "141122", "141221", "112214",
+    "112412", "122114", "122411", "142112", "142211", "241211", "221114",
+    "413111", "241112", "134111", "111242", "121142", "121241", "114212",
+    "124112", "124211", "411212", "421112", "421211", "212141", "214121",
+    "412121", "111143", "111341", "131141", "114113", "114311", "411113",
+    "411311", "113141", "114131", "311141", "411131", "211412", "211214",
+    "211232", "2331112",
+)
+
+START_B = 104
+STOP = 106
+QUIET_ZONE = 10
+
+
+def can_encode(text: str) -> bool:
+    return bool(text) and all(32 <= ord(ch) <= 126 for ch in text)
+
+
+def encode(text: str) -> list[int]:
+    """Return the symbol values for `text`, including start, checksum and stop."""
+    if not can_encode(text):
+        raise ValueError("Code 128B only supports printable ASCII")
+
+    values = [START_B] + [ord(ch) - 32 for ch in text]
+    checksum = values[0] + sum(i * v for i, v in enumerate(values[1:], start=1))
+
+    return values + [checksum % 103, STOP]
+
+
+def modules(text: str) -> list[tuple[bool, int]]:
+    """Flatten the symbols into (is_bar, width) runs."""
+    runs = []
+    for value in encode(text):
+        for i, width in enumerate(PATTERNS[value]):
+            runs.append((i % 2 == 0, int(width)))
+    return runs
+
+
+def svg(text: str, module_width: int = 2, height: int = 60) -> str:
+    runs = modules(text)
+    total = sum(w for _, w in runs) + 2 * QUIET_ZONE
+
+    x = QUIET_ZONE
+    rects = []
+    for is_bar, width in runs:
+        if is_bar:
+            rects.append(f'<rect x="{x}" y="0" width="{width}" height="{height}"/>')
+        x += width
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{total * module_width}" height="{height}" '
+        f'viewBox="0 0 {total} {height}" preserveAspectRatio="none" '
+        f'shape-rendering="crispEdges">'
+        f'<rect width="{total}" height="{height}" fill="#fff"/>'
+        f'<g fill="#000">{"".join(rects)}</g></svg>'
+    )
@@ -0,0 +1,54 @@
+"""
+Change detection for the in-memory catalog indexes.
+
+The facet and part-number indexes live in one worker's memory, while
+components and stock locations are also written by other workers,
+manage.py and set-based UPDATEs that no commit hook sees. Those rows carry
+an `updated_at` stamp, so before answering, an index asks which rows were
+stamped since it last looked.
+
+Stamps are taken before a writer waits for SQLite's write lock, so a
+transaction can commit rows stamped a little earlier than rows another
+transaction already committed. Rows stamped within WATERMARK_SLACK of the
+newest one seen are therefore checked again, and only (row, stamp) pairs
+not seen before count as changes.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+# Longer than a writer can wait for the lock plus a large batch commit
+WATERMARK_SLACK = timedelta(seconds=60)
+
+
+class ChangeTracker:
+    def __init__(self, *sources):
+        # (model, component id column) pairs; each model has `updated_at`
+        self._sources = sources
+        self._seen = {}
+        self._watermark = None
+
+    def reset(self):
+        """Track from now on. Call just before a full load."""
+        self._seen = {}
+        self._watermark = datetime.utcnow()
+
+    def changed(self, db: Session) -> set:
+        """Component ids whose rows changed since the last call."""
+        since = self._watermark - WATERMARK_SLACK
+        newest = self._watermark
+        changed = set()
+
+        for model, component_id in self._sources:
+            rows = db.query(model.id, component_id, model.updated_at).filter(model.updated_at >= since)
+            for row_id, cid, stamp in rows:
+                key = (model.__tablename__, row_id)
+                if self._seen.get(key) != stamp:
+                    self._seen[key] = stamp
+                    changed.add(cid)
+                newest = max(newest, stamp)
+
+        self._watermark = newest
+        cutoff = newest - WATERMARK_SLACK
+        self._seen = {key: stamp for key, stamp in self._seen.items() if stamp >= cutoff}
+        return changed
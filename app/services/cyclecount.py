@@ -0,0 +1,365 @@
+"""
+Cycle counts: reconcile stock with a physical count of one rack.
+
+Counted quantities are uploaded as a CSV or scanned in one bin at a time.
+Each line snapshots its bin's quantity when recorded (`expected`), and the
+review diffs every line against the live bins in one query. Applying adds
+counted - expected to each bin in set-based UPDATEs, recomputes the totals
+of the counted parts and commits once, with the reason kept on the count.
+
+Because adjustments are relative to the snapshot, nothing is locked while
+a rack is being counted: borrows and returns carry on, on other racks and
+on this one, and are neither lost nor counted twice when the count is
+applied.
+
+Every adjusted bin and part total gets an audit entry with its old and new
+quantity and the count's reason.
+"""
+import csv
+import io
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import case, exists, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core import audit
+from app.core.events import note_stock_change
+from app.models.component import Component
+from app.models.cycle_count import CycleCount, CycleCountLine
+from app.models.stock_location import StockLocation
+
+REQUIRED_COLUMNS = ("part_no", "counted")
+
+# Uncounted bins listed on the review page
+SHOW_UNCOUNTED = 50
+
+
+def _place(value: str | None) -> str:
+    return (value or "").strip()
+
+
+def get_count(db: Session, count_id: int) -> CycleCount:
+    count = db.query(CycleCount).filter(CycleCount.id == count_id).first()
+    if not count:
+        raise HTTPException(status_code=404, detail="Count not found")
+    return count
+
+
+def _open_count(db: Session, count_id: int) -> CycleCount:
+    count = get_count(db, count_id)
+    if count.status != "open":
+        raise HTTPException(status_code=400, detail="Count is no longer open")
+    return count
+
+
+def start_count(db: Session, user, rack: str) -> CycleCount:
+    rack = _place(rack)
+    if not rack:
+        raise HTTPException(status_code=400, detail="Rack is required")
+
+    if db.query(CycleCount.id).filter(CycleCount.rack == rack, CycleCount.status == "open").first():
+        raise HTTPException(status_code=400, detail=f"Rack {rack} already has an open count")
+
+    count = CycleCount(rack=rack, status="open", created_by=user.id)
+    db.add(count)
+    db.commit()
+    return count
+
+
+def cancel_count(db: Session, count_id: int):
+    count = _open_count(db, count_id)
+    count.status = "cancelled"
+    db.commit()
+
+
+# =========================
+# Recording counts
+# =========================
+def parse_count_csv(data: bytes, rack: str) -> list[tuple[str, str, int]]:
+    """
+    (part_no, location, counted) rows of a `part_no,location,counted` CSV.
+    An optional `rack` column must match the count's rack. Every invalid
+    row is reported at once.
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
+
+    rows, errors = [], []
+    for line, raw in enumerate(reader, start=2):
+        part_no = _place(raw.get("part_no"))
+        counted = _place(raw.get("counted"))
+        if not part_no and not counted:
+            continue
+
+        if not part_no:
+            errors.append(f"line {line}: empty part_no")
+        elif not counted.isdigit():
+            errors.append(f"line {line}: invalid counted quantity {counted!r}")
+        elif "rack" in raw and _place(raw["rack"]) not in ("", rack):
+            errors.append(f"line {line}: rack {_place(raw['rack'])!r} is not {rack!r}")
+        else:
+            rows.append((part_no, _place(raw.get("location")), int(counted)))
+
+    if errors:
+        raise HTTPException(status_code=400, detail="; ".join(errors))
+    if not rows:
+        raise HTTPException(status_code=400, detail="No counts in file")
+    return rows
+
+
+def record_counts(db: Session, count_id: int, rows: list[tuple[str, str, int]]) -> int:
+    """
+    Store counted quantities, replacing earlier counts of the same bins.
+    Rows for the same part and location are added together. Returns the
+    number of bins recorded.
+    """
+    count = _open_count(db, count_id)
+
+    part_nos = {part_no for part_no, _, _ in rows}
+    ids = dict(
+        db.query(Component.part_no, Component.id).filter(
+            Component.part_no.in_(part_nos),
+            Component.deleted_at.is_(None)
+        )
+    )
+    unknown = sorted(part_nos - set(ids))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown Part No: {', '.join(unknown)}")
+
+    counted = {}
+    for part_no, location, quantity in rows:
+        if quantity < 0:
+            raise HTTPException(status_code=400, detail="Invalid quantity")
+        key = (ids[part_no], _place(location))
+        counted[key] = counted.get(key, 0) + quantity
+
+    # Bin quantities as of now: what the count is measured against
+    component_ids = {cid for cid, _ in counted}
+    expected = {
+        (cid, location): quantity
+        for cid, location, quantity in db.query(
+            StockLocation.component_id, StockLocation.location, StockLocation.quantity
+        ).filter(
+            StockLocation.rack == count.rack,
+            StockLocation.component_id.in_(component_ids)
+        )
+    }
+    existing = {
+        (cid, location): line_id
+        for line_id, cid, location in db.query(
+            CycleCountLine.id, CycleCountLine.component_id, CycleCountLine.location
+        ).filter(
+            CycleCountLine.count_id == count.id,
+            CycleCountLine.component_id.in_(component_ids)
+        )
+    }
+
+    now = datetime.utcnow()
+    new_lines, recounts = [], []
+    for key, quantity in counted.items():
+        if key in existing:
+            recounts.append({"id": existing[key], "counted": quantity, "expected": expected.get(key, 0), "counted_at": now})
+        else:
+            new_lines.append({
+                "count_id": count.id, "component_id": key[0], "location": key[1],
+                "counted": quantity, "expected": expected.get(key, 0), "counted_at": now
+            })
+
+    if new_lines:
+        db.execute(insert(CycleCountLine), new_lines)
+    if recounts:
+        # Bulk UPDATE by primary key
+        db.execute(update(CycleCountLine), recounts)
+    db.commit()
+    return len(counted)
+
+
+# =========================
+# Review
+# =========================
+def _variance():
+    return CycleCountLine.counted - CycleCountLine.expected
+
+
+def _bin_of_line(count: CycleCount):
+    return (
+        (StockLocation.component_id == CycleCountLine.component_id)
+        & (StockLocation.rack == count.rack)
+        & (StockLocation.location == CycleCountLine.location)
+    )
+
+
+def variances(db: Session, count: CycleCount, changed_only: bool = True) -> list:
+    """
+    (line, component, current bin quantity, variance) for the count,
+    largest differences first, in one query.
+    """
+    variance = _variance()
+    query = (
+        db.query(CycleCountLine, Component, func.coalesce(StockLocation.quantity, 0), variance)
+        .join(Component, Component.id == CycleCountLine.component_id)
+        .outerjoin(StockLocation, _bin_of_line(count))
+        .filter(CycleCountLine.count_id == count.id)
+        .order_by(func.abs(variance).desc(), Component.part_no, CycleCountLine.location)
+    )
+    if changed_only:
+        query = query.filter(variance != 0)
+    return query.all()
+
+
+def summary(db: Session, count: CycleCount) -> dict:
+    variance = _variance()
+    lines, changed, over, short = db.query(
+        func.count(CycleCountLine.id),
+        func.count(case((variance != 0, 1))),
+        func.coalesce(func.sum(case((variance > 0, variance), else_=0)), 0),
+        func.coalesce(func.sum(case((variance < 0, -variance), else_=0)), 0)
+    ).filter(CycleCountLine.count_id == count.id).one()
+
+    return {"lines": lines, "changed": changed, "over": over, "short": short}
+
+
+def uncounted_bins(db: Session, count: CycleCount, limit: int = SHOW_UNCOUNTED) -> tuple[int, list]:
+    """Stocked bins of the rack with no count yet: (total, first `limit` as (bin, component))."""
+    query = (
+        db.query(StockLocation, Component)
+        .join(Component, Component.id == StockLocation.component_id)
+        .filter(
+            StockLocation.rack == count.rack,
+            StockLocation.quantity > 0,
+            Component.deleted_at.is_(None),
+            ~exists().where(
+                CycleCountLine.count_id == count.id,
+                _bin_of_line(count)
+            )
+        )
+    )
+    total = query.count()
+    return total, query.order_by(StockLocation.location, Component.part_no).limit(limit).all()
+
+
+# =========================
+# Apply
+# =========================
+def apply_count(db: Session, count_id: int, user, reason: str) -> int:
+    """
+    Adjust every counted bin by its variance and recompute the totals of
+    the parts involved, all in one transaction. Refused if any bin would
+    go below zero: stock has moved since it was counted, so that bin needs
+    counting again. Returns the number of bins adjusted.
+    """
+    reason = _place(reason)
+    if not reason:
+        raise HTTPException(status_code=400, detail="A reason is required")
+
+    count = get_count(db, count_id)
+    rack = count.rack
+    variance = _variance()
+
+    # Claim the count first, so it can only be applied once. This also takes
+    # the write lock, so the bins read below can't change before the UPDATE.
+    result = db.execute(
+        update(CycleCount)
+        .where(CycleCount.id == count.id, CycleCount.status == "open")
+        .values(status="applied", reason=reason, applied_by=user.id, applied_at=datetime.utcnow())
+        .execution_options(synchronize_session="fetch")
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=400, detail="Count is no longer open")
+
+    lines = (
+        db.query(
+            CycleCountLine.component_id, CycleCountLine.location, Component.part_no,
+            StockLocation.id, StockLocation.quantity, variance
+        )
+        .join(Component, Component.id == CycleCountLine.component_id)
+        .outerjoin(StockLocation, _bin_of_line(count))
+        .filter(CycleCountLine.count_id == count.id, variance != 0)
+        .all()
+    )
+
+    negative = [
+        f"{part_no} at {location or '-'}"
+        for _, location, part_no, _, quantity, change in lines
+        if (quantity or 0) + change < 0
+    ]
+    if negative:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Would go below zero, count these bins again: {', '.join(negative)}"
+        )
+
+    adjustment = (
+        select(variance)
+        .where(
+            CycleCountLine.count_id == count.id,
+            CycleCountLine.component_id == StockLocation.component_id,
+            CycleCountLine.location == StockLocation.location
+        )
+        .scalar_subquery()
+    )
+    existing = [line for line in lines if line[3] is not None]
+    adjusted = db.execute(
+        update(StockLocation)
+        .where(
+            StockLocation.rack == rack,
+            adjustment != 0,
+            StockLocation.quantity + adjustment >= 0
+        )
+        .values(quantity=StockLocation.quantity + adjustment)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if adjusted != len(existing):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Stock changed while applying, review the count again")
+
+    for _, _, _, location_id, quantity, change in existing:
+        audit.record(db, StockLocation.__tablename__, location_id, {
+            "quantity": [quantity, quantity + change],
+            "reason": [None, reason]
+        })
+
+    # Stock found where no bin was recorded
+    found = [
+        StockLocation(component_id=cid, rack=rack, location=location, quantity=change)
+        for cid, location, _, location_id, _, change in lines
+        if location_id is None
+    ]
+    db.add_all(found)
+    db.flush()
+    for loc in found:
+        audit.record(db, StockLocation.__tablename__, loc.id, {"reason": [None, reason]}, action="create")
+
+    changed = list({cid for cid, *_ in lines})
+    before = dict(db.query(Component.id, Component.quantity).filter(Component.id.in_(changed)))
+
+    total = (
+        select(func.coalesce(func.sum(StockLocation.quantity), 0))
+        .where(StockLocation.component_id == Component.id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(Component)
+        .where(Component.id.in_(changed))
+        .values(quantity=total)
+        .execution_options(synchronize_session=False)
+    )
+
+    for cid, quantity in db.query(Component.id, Component.quantity).filter(Component.id.in_(changed)):
+        note_stock_change(db, cid, quantity, quantity - before[cid])
+        audit.record(db, Component.__tablename__, cid, {
+            "quantity": [before[cid], quantity],
+            "reason": [None, reason]
+        })
+
+    db.commit()
+    return adjusted + len(found)
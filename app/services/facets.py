@@ -0,0 +1,183 @@
+"""
+Facet counts for the stock and request pages.
+
+An in-memory inverted index maps each facet value (category, rack, location,
+type) to the set of component ids carrying it. Before each count, the
+components and stock locations stamped since the last one are re-read in
+one query (see app.services.changes), so the index is never rebuilt from a
+GROUP BY over the whole catalog, and writes by other workers, manage.py or
+set-based UPDATEs are picked up too.
+"""
+import threading
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.component import Component
+from app.models.stock_location import StockLocation
+from app.services.changes import ChangeTracker
+
+FACETS = ("category", "rack", "location", "type")
+
+MAX_FACET_VALUES = 15
+
+
+def _clean(value: str | None) -> str:
+    return (value or "").strip()
+
+
+class FacetIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {f: {} for f in FACETS}
+        self._values = {}
+        self._changes = ChangeTracker(
+            (Component, Component.id),
+            (StockLocation, StockLocation.component_id)
+        )
+        self._loaded = False
+
+    def warm(self, db: Session):
+        """Load the index now instead of on the first query."""
+        with self._lock:
+            self._sync(db)
+
+    # ---------- maintenance ----------
+    def _read(self, db: Session, component_ids=None) -> dict:
+        """Facet values per component id, for all components or the given ones."""
+        components = db.query(Component.id, Component.category, Component.type).filter(
+            Component.deleted_at.is_(None)
+        )
+        places = db.query(StockLocation.component_id, StockLocation.rack, StockLocation.location)
+        if component_ids is not None:
+            components = components.filter(Component.id.in_(component_ids))
+            places = places.filter(StockLocation.component_id.in_(component_ids))
+
+        values = {}
+        for cid, category, type_ in components:
+            values[cid] = {
+                "category": {_clean(category)},
+                "type": {_clean(type_)},
+                "rack": set(),
+                "location": set()
+            }
+        for cid, rack, location in places:
+            if cid in values:
+                values[cid]["rack"].add(_clean(rack))
+                values[cid]["location"].add(_clean(location))
+        return values
+
+    def _remove(self, cid: int):
+        for facet, values in self._values.pop(cid, {}).items():
+            postings = self._postings[facet]
+            for value in values:
+                ids = postings.get(value)
+                if ids is None:
+                    continue
+                ids.discard(cid)
+                if not ids:
+                    del postings[value]
+
+    def _add(self, cid: int, values: dict):
+        self._values[cid] = values
+        for facet, facet_values in values.items():
+            for value in facet_values:
+                if value:
+                    self._postings[facet].setdefault(value, set()).add(cid)
+
+    def _sync(self, db: Session):
+        """Load on first use, then apply only what changed since. Caller holds the lock."""
+        if not self._loaded:
+            self._changes.reset()
+            for cid, values in self._read(db).items():
+                self._add(cid, values)
+            self._loaded = True
+            return
+
+        dirty = self._changes.changed(db)
+        if not dirty:
+            return
+
+        fresh = self._read(db, dirty)
+        for cid in dirty:
+            self._remove(cid)
+            if cid in fresh:
+                self._add(cid, fresh[cid])
+
+    # ---------- queries ----------
+    def counts(self, db: Session, selected: dict, restrict: set | None = None) -> dict:
+        """
+        Per facet, (value, count) pairs for components matching `restrict`
+        and every selected facet value except the facet's own, so the
+        current selection can be switched without clearing it first.
+        """
+        with self._lock:
+            self._sync(db)
+
+            chosen = {
+                facet: self._postings[facet].get(value, set())
+                for facet, value in selected.items()
+            }
+
+            result = {}
+            for facet in FACETS:
+                scope = restrict
+                for other, ids in chosen.items():
+                    if other != facet:
+                        scope = ids if scope is None else scope & ids
+
+                pairs = [
+                    (value, len(ids) if scope is None else len(ids & scope))
+                    for value, ids in self._postings[facet].items()
+                ]
+                pairs = [p for p in pairs if p[1]]
+                pairs.sort(key=lambda p: (-p[1], p[0]))
+                result[facet] = pairs
+
+            return result
+
+
+facet_index = FacetIndex()
+
+
+# =========================
+# Query helpers
+# =========================
+def selected_facets(**values) -> dict:
+    return {facet: value for facet, value in values.items() if value}
+
+
+def filter_facets(query, selected: dict):
+    """Exact facet matches, compared the way the index stores values."""
+    if "category" in selected:
+        query = query.filter(func.trim(Component.category) == selected["category"])
+    if "type" in selected:
+        query = query.filter(func.trim(Component.type) == selected["type"])
+    for facet in ("rack", "location"):
+        if facet in selected:
+            column = getattr(StockLocation, facet)
+            query = query.filter(Component.id.in_(
+                select(StockLocation.component_id).where(func.trim(column) == selected[facet])
+            ))
+    return query
+
+
+def facet_links(request, counts: dict, selected: dict) -> dict:
+    """Chip data for the facet bar: a link that toggles each value."""
+    links = {}
+    for facet, pairs in counts.items():
+        param = f"f_{facet}"
+        chips = []
+        shown = [
+            p for i, p in enumerate(pairs)
+            if i < MAX_FACET_VALUES or p[0] == selected.get(facet)
+        ]
+        for value, count in shown:
+            active = selected.get(facet) == value
+            url = request.url.remove_query_params([param, "page"])
+            if not active:
+                url = url.include_query_params(**{param: value})
+            chips.append({"value": value, "count": count, "active": active, "url": str(url)})
+        links[facet] = chips
+    return links
+
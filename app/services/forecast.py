@@ -0,0 +1,199 @@
+"""
+Demand forecasting and reorder suggestions.
+
+A batch job turns the last HISTORY_DAYS of borrow history into a
+components x days matrix of units borrowed and scores every part at once
+with NumPy:
+
+- short and long moving averages of daily demand,
+- the trend, a least-squares slope over the long window,
+- a daily rate: the short average projected along the trend to the middle
+  of the lead time, never below zero,
+- safety stock from day-to-day variability over the lead time, giving a
+  reorder point and an order-up-to quantity covering lead time plus
+  COVER_DAYS.
+
+History and stock are read from the reporting replica; results replace the
+`forecasts` table in one transaction, so pages read one precomputed row
+per part. Only parts borrowed within the window get a row
+in the matrix; the rest simply have no demand.
+
+Demand is units borrowed. Returns aren't netted out: a return always
+restocks the full loan and partial returns aren't recorded, so borrowed
+units are what stock has to cover.
+"""
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.core.replica import report_session
+from app.models.component import Component
+from app.models.forecast import Forecast
+from app.services.archive import request_history
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DAYS = 112
+SHORT_WINDOW = 14
+LONG_WINDOW = 56
+
+LEAD_TIME_DAYS = int(os.getenv("INVENTORY_REORDER_LEAD_DAYS", "14"))
+COVER_DAYS = int(os.getenv("INVENTORY_REORDER_COVER_DAYS", "30"))
+
+# Safety stock in standard deviations of lead-time demand (~95% service level)
+SERVICE_FACTOR = 1.65
+
+# The scheduled job only recomputes results older than this
+MAX_AGE = timedelta(hours=24)
+
+INSERT_BATCH_SIZE = 1000
+
+FORECAST_COLUMNS = (
+    "short_average", "long_average", "trend", "daily_rate",
+    "days_remaining", "reorder_point", "reorder_quantity"
+)
+
+
+def demand_matrix(db: Session, end: datetime):
+    """
+    (component ids, units borrowed per component per day) over the
+    HISTORY_DAYS up to and including the day of `end`, for parts borrowed
+    in that period. The last column is that day.
+    """
+    import numpy as np
+
+    history = request_history(include_archive=True)
+    start = end.date() - timedelta(days=HISTORY_DAYS - 1)
+    day = func.date(history.requested_at)
+
+    rows = (
+        db.query(history.component_id, day, func.sum(history.quantity))
+        .filter(history.requested_at >= datetime.combine(start, datetime.min.time()))
+        .group_by(history.component_id, day)
+        .all()
+    )
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.zeros((0, HISTORY_DAYS))
+
+    component_ids, days, units = zip(*rows)
+    component_ids = np.array(component_ids, dtype=np.int64)
+    offsets = (np.array(days, dtype="datetime64[D]") - np.datetime64(start)).astype(np.int64)
+
+    ids, row_index = np.unique(component_ids, return_inverse=True)
+    matrix = np.zeros((len(ids), HISTORY_DAYS))
+    in_window = (offsets >= 0) & (offsets < HISTORY_DAYS)
+    np.add.at(matrix, (row_index[in_window], offsets[in_window]), np.array(units, dtype=float)[in_window])
+
+    return ids, matrix
+
+
+def score(demand, quantity) -> dict:
+    """Forecast columns for each row of `demand` (days, oldest first) given stock on hand."""
+    import numpy as np
+
+    short_average = demand[:, -SHORT_WINDOW:].mean(axis=1)
+    window = demand[:, -LONG_WINDOW:]
+    long_average = window.mean(axis=1)
+
+    # Least-squares slope against centred day numbers, every part at once
+    x = np.arange(LONG_WINDOW) - (LONG_WINDOW - 1) / 2
+    trend = window @ x / (x @ x)
+
+    daily_rate = np.maximum(short_average + trend * LEAD_TIME_DAYS / 2, 0)
+
+    safety = SERVICE_FACTOR * window.std(axis=1) * np.sqrt(LEAD_TIME_DAYS)
+    reorder_point = np.ceil(daily_rate * LEAD_TIME_DAYS + safety)
+    order_up_to = np.ceil(daily_rate * (LEAD_TIME_DAYS + COVER_DAYS) + safety)
+    reorder_quantity = np.where(
+        (quantity <= reorder_point) & (daily_rate > 0),
+        np.maximum(order_up_to - quantity, 0),
+        0
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_remaining = np.where(daily_rate > 0, quantity / daily_rate, np.nan)
+
+    return {
+        "short_average": short_average,
+        "long_average": long_average,
+        "trend": trend,
+        "daily_rate": daily_rate,
+        "days_remaining": days_remaining,
+        "reorder_point": reorder_point,
+        "reorder_quantity": reorder_quantity,
+    }
+
+
+def compute_forecasts(now: datetime | None = None) -> int:
+    """Score every live component and replace the cached forecasts. Returns the row count."""
+    import numpy as np
+
+    now = now or datetime.utcnow()
+    started = time.perf_counter()
+
+    reports = report_session()
+    try:
+        stock = (
+            reports.query(Component.id, Component.quantity)
+            .filter(Component.deleted_at.is_(None))
+            .order_by(Component.id)
+            .all()
+        )
+        ids, matrix = demand_matrix(reports, now)
+    finally:
+        reports.close()
+
+    if stock:
+        component_ids, quantities = (np.array(c, dtype=np.int64) for c in zip(*stock))
+    else:
+        component_ids, quantities = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    live = np.isin(ids, component_ids)
+    positions = np.searchsorted(component_ids, ids[live])
+
+    # Parts not borrowed in the window: no demand, nothing to reorder
+    scores = {name: np.zeros(len(component_ids)) for name in FORECAST_COLUMNS}
+    scores["days_remaining"][:] = np.nan
+    for name, values in score(matrix[live], np.maximum(quantities[positions], 0)).items():
+        scores[name][positions] = values
+
+    columns = {name: values.tolist() for name, values in scores.items()}
+    columns["days_remaining"] = [None if math.isnan(d) else d for d in columns["days_remaining"]]
+    columns["reorder_point"] = [int(v) for v in columns["reorder_point"]]
+    columns["reorder_quantity"] = [int(v) for v in columns["reorder_quantity"]]
+
+    rows = [
+        {"component_id": cid, "computed_at": now, **{name: values[i] for name, values in columns.items()}}
+        for i, cid in enumerate(component_ids.tolist())
+    ]
+
+    db = SessionLocal()
+    try:
+        db.execute(delete(Forecast))
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            db.execute(insert(Forecast), rows[i:i + INSERT_BATCH_SIZE])
+        db.commit()
+    finally:
+        db.close()
+
+    logger.info("Scored %d components in %.2fs", len(rows), time.perf_counter() - started)
+    return len(rows)
+
+
+def refresh_forecasts() -> int:
+    """Scheduler job: recompute when the cached forecasts are missing or stale."""
+    db = SessionLocal()
+    try:
+        computed_at = db.query(func.max(Forecast.computed_at)).scalar()
+    finally:
+        db.close()
+
+    if computed_at and datetime.utcnow() - computed_at < MAX_AGE:
+        return 0
+    return compute_forecasts()
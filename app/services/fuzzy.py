@@ -0,0 +1,237 @@
+"""
+Typo-tolerant part lookup.
+
+Part numbers and description words are normalized into terms ("LM-317T" ->
+"LM317T") and indexed by trigram in memory. A query gathers candidate terms
+sharing trigrams with it, then ranks the best few by edit distance. Like the
+facet index, only components stamped since the last search are re-read
+before the next one, whichever process wrote them.
+"""
+import re
+import threading
+from collections import Counter
+from itertools import islice
+
+from sqlalchemy.orm import Session
+
+from app.models.component import Component
+from app.services.changes import ChangeTracker
+
+MIN_WORD_LENGTH = 3
+MIN_SIMILARITY = 0.5
+
+# Candidates re-ranked by edit distance per query term
+RERANK_SIZE = 50
+
+# Trigrams shared by more terms than this carry little signal and are only
+# used when a query has nothing rarer
+MAX_POSTINGS = 5000
+
+# Component ids taken per query term; ids of one term all score the same,
+# so a very common description word doesn't have to be walked in full
+EXPAND_LIMIT = 1000
+
+SUGGESTION_LIMIT = 5
+
+
+def normalize_key(text: str | None) -> str:
+    return re.sub(r"[^0-9A-Z]", "", (text or "").upper())
+
+
+def description_words(text: str | None) -> set:
+    words = {normalize_key(w) for w in re.split(r"\s+", text or "")}
+    return {w for w in words if len(w) >= MIN_WORD_LENGTH}
+
+
+def trigrams(term: str) -> set:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """1 - Levenshtein distance / longer length."""
+    if a == b:
+        return 1.0
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        previous = current
+
+    return 1 - previous[-1] / max(len(a), len(b))
+
+
+class FuzzyIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._terms = {}
+        self._trigrams = {}
+        self._doc_terms = {}
+        self._changes = ChangeTracker((Component, Component.id))
+        self._loaded = False
+
+    def warm(self, db: Session):
+        """Load the index now instead of on the first query."""
+        with self._lock:
+            self._sync(db)
+
+    # ---------- maintenance ----------
+    def _read(self, db: Session, component_ids=None) -> dict:
+        query = db.query(Component.id, Component.part_no, Component.description).filter(
+            Component.deleted_at.is_(None)
+        )
+        if component_ids is not None:
+            query = query.filter(Component.id.in_(component_ids))
+
+        docs = {}
+        for cid, part_no, description in query:
+            terms = description_words(description)
+            key = normalize_key(part_no)
+            if key:
+                terms.add(key)
+            docs[cid] = terms
+        return docs
+
+    def _remove(self, cid: int):
+        for term in self._doc_terms.pop(cid, ()):
+            ids = self._terms.get(term)
+            if ids is None:
+                continue
+            ids.discard(cid)
+            if not ids:
+                del self._terms[term]
+                for gram in trigrams(term):
+                    postings = self._trigrams.get(gram)
+                    if postings is not None:
+                        postings.discard(term)
+                        if not postings:
+                            del self._trigrams[gram]
+
+    def _add(self, cid: int, terms: set):
+        self._doc_terms[cid] = terms
+        for term in terms:
+            if term not in self._terms:
+                self._terms[term] = set()
+                for gram in trigrams(term):
+                    self._trigrams.setdefault(gram, set()).add(term)
+            self._terms[term].add(cid)
+
+    def _sync(self, db: Session):
+        """Load on first use, then apply only what changed since. Caller holds the lock."""
+        if not self._loaded:
+            self._changes.reset()
+            for cid, terms in self._read(db).items():
+                self._add(cid, terms)
+            self._loaded = True
+            return
+
+        dirty = self._changes.changed(db)
+        if not dirty:
+            return
+
+        fresh = self._read(db, dirty)
+        for cid in dirty:
+            self._remove(cid)
+            if cid in fresh:
+                self._add(cid, fresh[cid])
+
+    # ---------- queries ----------
+    def _match_term(self, query: str) -> list[tuple[str, float]]:
+        grams = trigrams(query)
+        postings = sorted(
+            (self._trigrams[g] for g in grams if g in self._trigrams),
+            key=len
+        )
+        if not postings:
+            return []
+
+        useful = [p for p in postings if len(p) <= MAX_POSTINGS] or postings[:1]
+
+        shared = Counter()
+        for terms in useful:
+            shared.update(terms)
+
+        # Dice coefficient on trigrams picks the candidates worth an edit distance
+        candidates = sorted(
+            shared,
+            key=lambda t: -2 * shared[t] / (len(grams) + len(t) + 1)
+        )[:RERANK_SIZE]
+
+        scored = [(term, similarity(query, term)) for term in candidates]
+        return [(t, s) for t, s in scored if s >= MIN_SIMILARITY]
+
+    def _match(self, query: str) -> dict:
+        """Best score per component id for one query term."""
+        best = {}
+        matches = sorted(self._match_term(query), key=lambda m: -m[1])
+        for term, score in matches:
+            if len(best) >= EXPAND_LIMIT:
+                break
+            for cid in islice(self._terms[term], EXPAND_LIMIT):
+                if cid not in best:
+                    best[cid] = score
+        return best
+
+    def search(self, db: Session, text: str, limit: int = SUGGESTION_LIMIT) -> list[tuple[int, float]]:
+        """Ranked (component_id, score) pairs for a possibly mistyped part number or description."""
+        key = normalize_key(text)
+        if not key:
+            return []
+
+        words = [w for w in (normalize_key(w) for w in text.split()) if len(w) >= MIN_WORD_LENGTH]
+
+        with self._lock:
+            self._sync(db)
+
+            # The whole query as one key catches "LM 317T"; words catch descriptions
+            scores = Counter(self._match(key))
+
+            if len(words) > 1:
+                combined = Counter()
+                for word in words:
+                    for cid, score in self._match(word).items():
+                        combined[cid] += score / len(words)
+                for cid, score in combined.items():
+                    scores[cid] = max(scores[cid], score)
+
+            return scores.most_common(limit)
+
+
+fuzzy_index = FuzzyIndex()
+
+
+def did_you_mean(request, db: Session, text: str | None) -> list[dict]:
+    """Suggestion links for an empty result page, each filtering on the exact part number."""
+    if not text:
+        return []
+
+    matches = fuzzy_index.search(db, text)
+    if not matches:
+        return []
+
+    components = {
+        c.id: c
+        for c in db.query(Component).filter(Component.id.in_([cid for cid, _ in matches]))
+    }
+
+    suggestions = []
+    for cid, score in matches:
+        component = components.get(cid)
+        if not component:
+            continue
+        url = request.url.remove_query_params(["description", "page"])
+        url = url.include_query_params(part_no=component.part_no or "")
+        suggestions.append({
+            "part_no": component.part_no,
+            "description": component.description,
+            "score": round(score, 2),
+            "url": str(url)
+        })
+    return suggestions
+
@@ -0,0 +1,301 @@
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core import audit
+from app.core.events import note_stock_change
+from app.models.component import Component
+from app.models.request import Request as RequestModel, RequestLocation
+from app.models.reservation import Reservation
+from app.services.loans import due_date_for
+from app.services.locations import put_to_location, sync_primary_location, take_from_location
+from app.services.parametric import PARAMETRIC_FIELDS, normalize
+
+COMPONENT_FIELDS = (
+    "category", "description", "value", "size", "voltage", "watt",
+    "type", "part_no", "rack", "location", "quantity"
+)
+
+
+# =========================
+# Components
+# =========================
+def get_component(db: Session, component_id: int) -> Component:
+    component = db.query(Component).filter(
+        Component.id == component_id,
+        Component.deleted_at.is_(None)
+    ).first()
+    if not component:
+        raise HTTPException(status_code=404, detail="Component not found")
+    return component
+
+
+def ensure_unique_part_no(db: Session, part_no: str, exclude_id: int | None = None):
+    # Deleted components keep their part_no, so they still count
+    query = db.query(Component.deleted_at).filter(Component.part_no == part_no)
+    if exclude_id is not None:
+        query = query.filter(Component.id != exclude_id)
+
+    existing = query.first()
+    if existing and existing.deleted_at:
+        raise HTTPException(status_code=400, detail="Part No belongs to a deleted component, restore it instead")
+    if existing:
+        raise HTTPException(status_code=400, detail="Part No already exists")
+
+
+def create_component(db: Session, **fields) -> Component:
+    ensure_unique_part_no(db, fields["part_no"])
+
+    component = Component(**fields)
+    normalize(component)
+    db.add(component)
+    db.flush()
+
+    sync_primary_location(db, component, component.rack, component.location)
+
+    db.commit()
+    return component
+
+
+def update_component(db: Session, component: Component, **fields) -> Component:
+    if "part_no" in fields and fields["part_no"] != component.part_no:
+        ensure_unique_part_no(db, fields["part_no"], exclude_id=component.id)
+
+    old_rack, old_location = component.rack, component.location
+
+    for name, value in fields.items():
+        setattr(component, name, value)
+
+    if fields.keys() & PARAMETRIC_FIELDS.keys():
+        normalize(component)
+
+    if fields.keys() & {"quantity", "rack", "location"}:
+        sync_primary_location(db, component, old_rack, old_location)
+
+    db.commit()
+    return component
+
+
+def delete_component(db: Session, component: Component):
+    """
+    Soft delete: past and open requests still join to the row, and its
+    image and locations are kept so it can be restored.
+    """
+    component.deleted_at = datetime.utcnow()
+    db.commit()
+
+
+def restore_component(db: Session, component_id: int) -> Component:
+    component = db.query(Component).filter(
+        Component.id == component_id,
+        Component.deleted_at.isnot(None)
+    ).first()
+    if not component:
+        raise HTTPException(status_code=404, detail="Deleted component not found")
+
+    component.deleted_at = None
+    db.commit()
+    return component
+
+
+# =========================
+# Stock levels
+# =========================
+def held_quantity(component_id, now: datetime):
+    """Correlated subquery: units held by unexpired active reservations."""
+    return (
+        select(func.coalesce(func.sum(Reservation.quantity), 0))
+        .where(
+            Reservation.component_id == component_id,
+            Reservation.status == "active",
+            Reservation.expires_at > now
+        )
+        .scalar_subquery()
+    )
+
+
+def held_quantities(db: Session, component_ids) -> dict:
+    """Active holds per component for a page of components, in one query."""
+    if not component_ids:
+        return {}
+
+    rows = (
+        db.query(Reservation.component_id, func.sum(Reservation.quantity))
+        .filter(
+            Reservation.component_id.in_(component_ids),
+            Reservation.status == "active",
+            Reservation.expires_at > datetime.utcnow()
+        )
+        .group_by(Reservation.component_id)
+        .all()
+    )
+    return dict(rows)
+
+
+def available_quantity(db: Session, component: Component) -> int:
+    return component.quantity - held_quantities(db, [component.id]).get(component.id, 0)
+
+
+def take_stock(
+    db: Session,
+    component_id: int,
+    quantity: int,
+    location_id: int | None = None
+) -> list[tuple[int, int]]:
+    """
+    Decrement stock in conditional UPDATEs so concurrent borrows can't
+    both pass the availability check: first the component total (net of
+    holds), then the location(s). Returns the (location id, quantity)
+    taken from each. Does not commit.
+    """
+    result = db.execute(
+        update(Component)
+        .where(
+            Component.id == component_id,
+            Component.deleted_at.is_(None),
+            Component.quantity - held_quantity(Component.id, datetime.utcnow()) >= quantity
+        )
+        .values(quantity=Component.quantity - quantity)
+        .execution_options(synchronize_session="fetch")
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=400, detail="Insufficient stock")
+
+    try:
+        takes = take_from_location(db, component_id, quantity, location_id)
+    except HTTPException:
+        db.rollback()
+        raise
+
+    _note_quantity(db, component_id, -quantity)
+    return takes
+
+
+def record_takes(db: Session, req: RequestModel, takes: list[tuple[int, int]]):
+    """Remember which locations a new request took from. Does not commit."""
+    req.location_id = takes[0][0]
+    db.add(req)
+    db.flush()
+
+    db.add_all(
+        RequestLocation(request_id=req.id, location_id=location_id, quantity=quantity)
+        for location_id, quantity in takes
+    )
+
+
+def request_takes(db: Session, req: RequestModel) -> list[tuple[int, int]]:
+    """Where a request's units came from. Older requests only know one location."""
+    takes = (
+        db.query(RequestLocation.location_id, RequestLocation.quantity)
+        .filter(RequestLocation.request_id == req.id)
+        .order_by(RequestLocation.id)
+        .all()
+    )
+    return [tuple(t) for t in takes] or [(req.location_id, req.quantity)]
+
+
+def put_stock(db: Session, component_id: int, quantity: int, takes: list[tuple[int, int]]):
+    """
+    Increment stock in place (returns), refilling the locations in `takes`
+    up to what was taken from each. Does not commit.
+    """
+    db.execute(
+        update(Component)
+        .where(Component.id == component_id)
+        .values(quantity=Component.quantity + quantity)
+        .execution_options(synchronize_session="fetch")
+    )
+
+    remaining = quantity
+    for location_id, taken in takes:
+        if remaining <= 0:
+            break
+        put = min(remaining, taken)
+        put_to_location(db, component_id, put, location_id)
+        remaining -= put
+    if remaining > 0:
+        put_to_location(db, component_id, remaining, None)
+
+    _note_quantity(db, component_id, quantity)
+
+
+def _note_quantity(db: Session, component_id: int, delta: int):
+    quantity = db.query(Component.quantity).filter(Component.id == component_id).scalar()
+    note_stock_change(db, component_id, quantity, delta)
+    audit.record(db, Component.__tablename__, component_id, {"quantity": [quantity - delta, quantity]})
+
+
+# =========================
+# Borrow / Return
+# =========================
+def borrow_component(
+    db: Session,
+    user,
+    component_id: int,
+    quantity: int,
+    remarks: str | None = None,
+    location_id: int | None = None
+) -> RequestModel:
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Invalid quantity")
+
+    component = get_component(db, component_id)
+    takes = take_stock(db, component.id, quantity, location_id)
+
+    req = RequestModel(
+        user_id=user.id,
+        component_id=component.id,
+        quantity=quantity,
+        status="borrowed",
+        due_at=due_date_for(db, component),
+        remarks=remarks
+    )
+    record_takes(db, req, takes)
+
+    db.commit()
+    return req
+
+
+def return_request(db: Session, user, request_id: int, return_qty: int) -> RequestModel:
+    req = db.query(RequestModel).filter(RequestModel.id == request_id).first()
+
+    if not req:
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    if req.status != "borrowed":
+        raise HTTPException(status_code=400, detail="Request already returned")
+
+    # Permission check
+    if user.role != "admin" and req.user_id != user.id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    if return_qty <= 0:
+        raise HTTPException(status_code=400, detail="Invalid return quantity")
+
+    if return_qty > req.quantity:
+        raise HTTPException(
+            status_code=400,
+            detail="Return quantity exceeds borrowed quantity"
+        )
+
+    component = db.query(Component).filter(Component.id == req.component_id).first()
+    if not component:
+        raise HTTPException(status_code=404, detail="Component not found")
+
+    # Full return only (for now). Conditional so a double submit can't restock twice.
+    closed = db.execute(
+        update(RequestModel)
+        .where(RequestModel.id == req.id, RequestModel.status == "borrowed")
+        .values(status="returned", returned_at=datetime.utcnow())
+        .execution_options(synchronize_session="fetch")
+    )
+    if closed.rowcount == 0:
+        raise HTTPException(status_code=400, detail="Request already returned")
+
+    # Stock update
+    put_stock(db, component.id, return_qty, request_takes(db, req))
+
+    db.commit()
+    return req
@@ -0,0 +1,201 @@
+"""
+Kits: named bills of materials (component x quantity per kit).
+
+How many complete kits current stock allows is one GROUP BY over the kit
+lines joined with each component's unheld quantity, for one kit or all of
+them at once. Borrowing a kit takes every line inside one transaction; if
+any line is short, nothing is taken.
+"""
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.models.component import Component
+from app.models.kit import Kit, KitItem
+from app.models.request import Request as RequestModel
+from app.models.reservation import Reservation
+from app.services.inventory import record_takes, take_stock
+from app.services.loans import due_date_for
+
+MAX_KITS_PER_BORROW = 100
+
+
+def available_stock(now: datetime):
+    """Subquery of (component_id, available): quantity net of active holds, 0 for deleted parts."""
+    holds = (
+        select(Reservation.component_id, func.sum(Reservation.quantity).label("held"))
+        .where(Reservation.status == "active", Reservation.expires_at > now)
+        .group_by(Reservation.component_id)
+        .subquery()
+    )
+    net = Component.quantity - func.coalesce(holds.c.held, 0)
+
+    return (
+        select(
+            Component.id.label("component_id"),
+            case((Component.deleted_at.is_(None) & (net > 0), net), else_=0).label("available")
+        )
+        .outerjoin(holds, holds.c.component_id == Component.id)
+        .subquery()
+    )
+
+
+def buildable_counts(db: Session, kit_ids=None) -> dict:
+    """Complete kits current stock allows, per kit id, in one query."""
+    stock = available_stock(datetime.utcnow())
+
+    query = (
+        db.query(
+            KitItem.kit_id,
+            func.min(func.coalesce(stock.c.available, 0) // KitItem.quantity)
+        )
+        .outerjoin(stock, stock.c.component_id == KitItem.component_id)
+        .group_by(KitItem.kit_id)
+    )
+    if kit_ids is not None:
+        query = query.filter(KitItem.kit_id.in_(kit_ids))
+
+    return {kit_id: int(count) for kit_id, count in query}
+
+
+def kit_lines(db: Session, kit_ids=None) -> dict:
+    """Per kit id, its lines as (KitItem, Component, available), in one query."""
+    stock = available_stock(datetime.utcnow())
+
+    query = (
+        db.query(KitItem, Component, func.coalesce(stock.c.available, 0))
+        .join(Component, KitItem.component_id == Component.id)
+        .outerjoin(stock, stock.c.component_id == KitItem.component_id)
+        .order_by(KitItem.kit_id, Component.part_no)
+    )
+    if kit_ids is not None:
+        query = query.filter(KitItem.kit_id.in_(kit_ids))
+
+    lines = {}
+    for item, component, available in query:
+        lines.setdefault(item.kit_id, []).append((item, component, available))
+    return lines
+
+
+def get_kit(db: Session, kit_id: int) -> Kit:
+    kit = db.query(Kit).filter(Kit.id == kit_id).first()
+    if not kit:
+        raise HTTPException(status_code=404, detail="Kit not found")
+    return kit
+
+
+def parse_lines(text: str) -> list[tuple[str, int]]:
+    """`PART_NO, QTY` per line (QTY defaults to 1) into (part_no, quantity) pairs."""
+    lines = []
+    for number, raw in enumerate(text.splitlines(), start=1):
+        raw = raw.strip()
+        if not raw:
+            continue
+
+        part_no, _, qty = raw.rpartition(",") if "," in raw else (raw, "", "1")
+        try:
+            quantity = int(qty)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Line {number}: invalid quantity")
+        if quantity <= 0:
+            raise HTTPException(status_code=400, detail=f"Line {number}: invalid quantity")
+
+        lines.append((part_no.strip(), quantity))
+    return lines
+
+
+def create_kit(db: Session, name: str, description: str | None, lines: list[tuple[str, int]]) -> Kit:
+    name = name.strip()
+    if not name:
+        raise HTTPException(status_code=400, detail="Kit name is required")
+    if not lines:
+        raise HTTPException(status_code=400, detail="A kit needs at least one component")
+    if db.query(Kit.id).filter(Kit.name == name).first():
+        raise HTTPException(status_code=400, detail="Kit name already exists")
+
+    part_nos = {part_no for part_no, _ in lines}
+    ids = dict(
+        db.query(Component.part_no, Component.id).filter(
+            Component.part_no.in_(part_nos),
+            Component.deleted_at.is_(None)
+        )
+    )
+    unknown = sorted(part_nos - set(ids))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown Part No: {', '.join(unknown)}")
+
+    # The same part listed twice is one line
+    quantities = {}
+    for part_no, quantity in lines:
+        quantities[ids[part_no]] = quantities.get(ids[part_no], 0) + quantity
+
+    kit = Kit(name=name, description=description)
+    db.add(kit)
+    db.flush()
+    db.add_all(
+        KitItem(kit_id=kit.id, component_id=cid, quantity=qty)
+        for cid, qty in quantities.items()
+    )
+    db.commit()
+    return kit
+
+
+def delete_kit(db: Session, kit_id: int):
+    kit = get_kit(db, kit_id)
+    db.query(KitItem).filter(KitItem.kit_id == kit.id).delete(synchronize_session=False)
+    db.delete(kit)
+    db.commit()
+
+
+def borrow_kit(db: Session, user, kit_id: int, count: int = 1, remarks: str | None = None) -> list[RequestModel]:
+    """
+    Borrow `count` complete kits: one request per line, all committed
+    together. Each line is a conditional stock UPDATE, so a line that
+    another borrow drained in the meantime fails the whole kit.
+    """
+    if not 0 < count <= MAX_KITS_PER_BORROW:
+        raise HTTPException(status_code=400, detail="Invalid quantity")
+
+    kit = get_kit(db, kit_id)
+    lines = (
+        db.query(KitItem, Component)
+        .join(Component, KitItem.component_id == Component.id)
+        .filter(KitItem.kit_id == kit.id)
+        .order_by(KitItem.component_id)
+        .all()
+    )
+    if not lines:
+        raise HTTPException(status_code=400, detail="Kit has no components")
+
+    note = f"Kit: {kit.name}" + (f" - {remarks}" if remarks else "")
+
+    requests = []
+    try:
+        for item, component in lines:
+            if component.deleted_at is not None:
+                raise HTTPException(status_code=400, detail=f"{component.part_no} has been deleted")
+
+            quantity = item.quantity * count
+            try:
+                takes = take_stock(db, component.id, quantity)
+            except HTTPException as e:
+                raise HTTPException(status_code=e.status_code, detail=f"{e.detail}: {component.part_no}")
+
+            req = RequestModel(
+                user_id=user.id,
+                component_id=component.id,
+                quantity=quantity,
+                status="borrowed",
+                due_at=due_date_for(db, component),
+                remarks=note
+            )
+            record_takes(db, req, takes)
+            requests.append(req)
+    except HTTPException:
+        db.rollback()
+        raise
+
+    db.commit()
+    return requests
@@ -0,0 +1,158 @@
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.component import Component
+from app.models.job_state import JobState
+from app.models.loan_period import LoanPeriod
+from app.models.outbox import OutboxMessage
+from app.models.request import Request as RequestModel
+
+DEFAULT_LOAN_DAYS = 14
+
+SWEEP_JOB = "overdue_sweep"
+SWEEP_BATCH_SIZE = 500
+
+
+def loan_days(db: Session, category: str | None) -> int:
+    days = db.query(LoanPeriod.days).filter(LoanPeriod.category == category).scalar()
+    return days or DEFAULT_LOAN_DAYS
+
+
+def due_date_for(db: Session, component: Component, start: datetime | None = None) -> datetime:
+    return (start or datetime.utcnow()) + timedelta(days=loan_days(db, component.category))
+
+
+def overdue_query(db: Session, now: datetime | None = None):
+    """Open loans past due, served by the (status, due_at) index."""
+    return db.query(RequestModel).filter(
+        RequestModel.status == "borrowed",
+        RequestModel.due_at < (now or datetime.utcnow())
+    )
+
+
+# =========================
+# Scheduled jobs
+# =========================
+def _read_watermark(db: Session) -> str:
+    """The raw watermark value, creating the row on first use."""
+    db.execute(
+        sqlite_insert(JobState)
+        .values(name=SWEEP_JOB, value="", updated_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=[JobState.name])
+    )
+    db.commit()
+    return db.query(JobState.value).filter(JobState.name == SWEEP_JOB).scalar()
+
+
+def _parse_watermark(value: str) -> tuple[datetime, int]:
+    if not value:
+        return datetime.min, 0
+
+    due, _, last_id = value.partition("|")
+    return datetime.fromisoformat(due), int(last_id)
+
+
+def sweep_overdue() -> int:
+    """
+    Queue one reminder per loan that became overdue since the last run.
+    The (due_at, id) watermark means each run only reads loans whose due
+    date passed in between, instead of rescanning every open loan.
+
+    Every worker runs this job. A batch is only queued by the run that
+    advances the watermark from the value it read, and the unique
+    (kind, request_id, due_at) index drops any reminder queued twice.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        queued = 0
+
+        while True:
+            watermark = _read_watermark(db)
+            last_due, last_id = _parse_watermark(watermark)
+
+            loans = (
+                db.query(
+                    RequestModel.id, RequestModel.user_id, RequestModel.component_id,
+                    RequestModel.quantity, RequestModel.due_at
+                )
+                .filter(
+                    RequestModel.status == "borrowed",
+                    RequestModel.due_at <= now,
+                    or_(
+                        RequestModel.due_at > last_due,
+                        and_(RequestModel.due_at == last_due, RequestModel.id > last_id)
+                    )
+                )
+                .order_by(RequestModel.due_at, RequestModel.id)
+                .limit(SWEEP_BATCH_SIZE)
+                .all()
+            )
+            # End the read so the claim below sees other workers' commits
+            db.rollback()
+            if not loans:
+                return queued
+
+            claimed = db.execute(
+                update(JobState)
+                .where(JobState.name == SWEEP_JOB, JobState.value == watermark)
+                .values(value=f"{loans[-1].due_at.isoformat()}|{loans[-1].id}", updated_at=now)
+            ).rowcount
+            if not claimed:
+                # Another worker took this batch; continue from its watermark
+                db.rollback()
+                continue
+
+            db.execute(
+                sqlite_insert(OutboxMessage).on_conflict_do_nothing(
+                    index_elements=[OutboxMessage.kind, OutboxMessage.request_id, OutboxMessage.due_at]
+                ),
+                [
+                    {
+                        "kind": "overdue_reminder",
+                        "user_id": r.user_id,
+                        "request_id": r.id,
+                        "due_at": r.due_at,
+                        "created_at": now,
+                        "payload": json.dumps({
+                            "component_id": r.component_id,
+                            "quantity": r.quantity,
+                            "due_at": r.due_at.isoformat()
+                        })
+                    }
+                    for r in loans
+                ]
+            )
+            db.commit()
+
+            queued += len(loans)
+    finally:
+        db.close()
+
+
+def backfill_due_dates():
+    """Give loans created before due dates existed one, based on their category."""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(RequestModel, Component.category)
+            .join(Component, RequestModel.component_id == Component.id)
+            .filter(RequestModel.status == "borrowed", RequestModel.due_at.is_(None))
+            .all()
+        )
+        if not rows:
+            return
+
+        periods = dict(db.query(LoanPeriod.category, LoanPeriod.days).all())
+        for req, category in rows:
+            days = periods.get(category, DEFAULT_LOAN_DAYS)
+            req.due_at = (req.requested_at or datetime.utcnow()) + timedelta(days=days)
+
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,257 @@
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.core import audit
+from app.core.database import SessionLocal
+from app.models.component import Component
+from app.models.stock_location import StockLocation
+
+
+def _place(value: str | None) -> str:
+    return (value or "").strip()
+
+
+def location_label(loc: StockLocation) -> str:
+    return " / ".join(p for p in (loc.rack, loc.location) if p) or "-"
+
+
+def locations_for(db: Session, component_ids) -> dict:
+    """Locations for a page of components, in one query."""
+    if not component_ids:
+        return {}
+
+    result = {}
+    rows = (
+        db.query(StockLocation)
+        .filter(StockLocation.component_id.in_(component_ids))
+        .order_by(StockLocation.component_id, StockLocation.rack, StockLocation.location)
+        .all()
+    )
+    for loc in rows:
+        result.setdefault(loc.component_id, []).append(loc)
+    return result
+
+
+def _record_quantity(db: Session, location_id: int, delta: int):
+    """Audit a set-based quantity change of one location."""
+    if not audit.auditing(db):
+        return
+    quantity = db.query(StockLocation.quantity).filter(StockLocation.id == location_id).scalar()
+    audit.record(db, StockLocation.__tablename__, location_id, {"quantity": [quantity - delta, quantity]})
+
+
+def find_location(db: Session, component_id: int, rack: str | None, location: str | None):
+    return db.query(StockLocation).filter(
+        StockLocation.component_id == component_id,
+        StockLocation.rack == _place(rack),
+        StockLocation.location == _place(location)
+    ).first()
+
+
+def sync_primary_location(
+    db: Session,
+    component: Component,
+    old_rack: str | None,
+    old_location: str | None
+):
+    """
+    Keep the component's own rack/location row in step after an add or
+    edit: follow a rack/location rename and absorb a changed total.
+    Does not commit.
+    """
+    primary = find_location(db, component.id, old_rack, old_location)
+    target = find_location(db, component.id, component.rack, component.location)
+
+    if primary and target and primary.id != target.id:
+        # Renamed onto an existing location: merge into it
+        target.quantity += primary.quantity
+        db.delete(primary)
+        primary = target
+    elif primary:
+        primary.rack = _place(component.rack)
+        primary.location = _place(component.location)
+    elif target:
+        primary = target
+    else:
+        primary = StockLocation(
+            component_id=component.id,
+            rack=_place(component.rack),
+            location=_place(component.location),
+            quantity=0
+        )
+        db.add(primary)
+
+    db.flush()
+
+    others = (
+        db.query(func.coalesce(func.sum(StockLocation.quantity), 0))
+        .filter(StockLocation.component_id == component.id, StockLocation.id != primary.id)
+        .scalar()
+    )
+    if component.quantity < others:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Quantity is lower than the {others} stocked at other locations"
+        )
+
+    primary.quantity = component.quantity - others
+
+
+def take_from_location(
+    db: Session,
+    component_id: int,
+    quantity: int,
+    location_id: int | None
+) -> list[tuple[int, int]]:
+    """
+    Decrement one location in a conditional UPDATE. Without a location,
+    bins are drained from the fullest down. Returns the (location id,
+    quantity) taken from each. Does not commit.
+    """
+    if location_id is None:
+        return _take_from_bins(db, component_id, quantity)
+
+    result = db.execute(
+        update(StockLocation)
+        .where(
+            StockLocation.id == location_id,
+            StockLocation.component_id == component_id,
+            StockLocation.quantity >= quantity
+        )
+        .values(quantity=StockLocation.quantity - quantity)
+        .execution_options(synchronize_session="fetch")
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=400, detail="Insufficient stock at this location")
+
+    _record_quantity(db, location_id, -quantity)
+    return [(location_id, quantity)]
+
+
+def _take_from_bins(db: Session, component_id: int, quantity: int) -> list[tuple[int, int]]:
+    """Take `quantity` across the component's bins, fullest first."""
+    bins = (
+        db.query(StockLocation.id, StockLocation.quantity)
+        .filter(StockLocation.component_id == component_id, StockLocation.quantity > 0)
+        .order_by(StockLocation.quantity.desc(), StockLocation.id)
+        .all()
+    )
+
+    takes = []
+    remaining = quantity
+    for bin_id, available in bins:
+        if remaining <= 0:
+            break
+
+        take = min(remaining, available)
+        result = db.execute(
+            update(StockLocation)
+            .where(StockLocation.id == bin_id, StockLocation.quantity >= take)
+            .values(quantity=StockLocation.quantity - take)
+            .execution_options(synchronize_session="fetch")
+        )
+        # A concurrent borrow got to this bin first, try the next one
+        if result.rowcount == 0:
+            continue
+
+        _record_quantity(db, bin_id, -take)
+        takes.append((bin_id, take))
+        remaining -= take
+
+    if remaining > 0:
+        raise HTTPException(status_code=400, detail="Insufficient stock at this location")
+
+    return takes
+
+
+def put_to_location(db: Session, component_id: int, quantity: int, location_id: int | None):
+    """Increment a location, falling back to the component's own rack/location. Does not commit."""
+    if location_id is not None:
+        result = db.execute(
+            update(StockLocation)
+            .where(StockLocation.id == location_id, StockLocation.component_id == component_id)
+            .values(quantity=StockLocation.quantity + quantity)
+            .execution_options(synchronize_session="fetch")
+        )
+        if result.rowcount:
+            _record_quantity(db, location_id, quantity)
+            return
+
+    component = db.query(Component).filter(Component.id == component_id).first()
+    add_to_place(db, component_id, component.rack, component.location, quantity)
+
+
+def add_to_place(db: Session, component_id: int, rack: str | None, location: str | None, quantity: int):
+    loc = find_location(db, component_id, rack, location)
+    if loc:
+        db.execute(
+            update(StockLocation)
+            .where(StockLocation.id == loc.id)
+            .values(quantity=StockLocation.quantity + quantity)
+            .execution_options(synchronize_session="fetch")
+        )
+        _record_quantity(db, loc.id, quantity)
+    else:
+        db.add(StockLocation(
+            component_id=component_id,
+            rack=_place(rack),
+            location=_place(location),
+            quantity=quantity
+        ))
+        db.flush()
+
+
+def transfer(
+    db: Session,
+    component_id: int,
+    from_location_id: int,
+    to_rack: str | None,
+    to_location: str | None,
+    quantity: int
+):
+    """Move stock between locations. The component total is unchanged."""
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Invalid quantity")
+
+    source = db.query(StockLocation).filter(
+        StockLocation.id == from_location_id,
+        StockLocation.component_id == component_id
+    ).first()
+    if not source:
+        raise HTTPException(status_code=404, detail="Location not found")
+
+    if source.rack == _place(to_rack) and source.location == _place(to_location):
+        raise HTTPException(status_code=400, detail="Source and destination are the same")
+
+    take_from_location(db, component_id, quantity, from_location_id)
+    add_to_place(db, component_id, to_rack, to_location, quantity)
+
+    db.commit()
+
+
+def backfill_stock_locations():
+    """Seed one location row per component from its own rack/location/quantity."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(StockLocation).from_select(
+                ["component_id", "rack", "location", "quantity", "updated_at"],
+                select(
+                    Component.id,
+                    func.trim(func.coalesce(Component.rack, literal(""))),
+                    func.trim(func.coalesce(Component.location, literal(""))),
+                    func.coalesce(Component.quantity, literal(0)),
+                    literal(datetime.utcnow())
+                ).where(
+                    ~select(StockLocation.id)
+                    .where(StockLocation.component_id == Component.id)
+                    .exists()
+                )
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
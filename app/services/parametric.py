@@ -0,0 +1,163 @@
+import re
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.component import Component
+from app.models.job_state import JobState
+
+# Text column -> numeric column it is normalized into
+PARAMETRIC_FIELDS = {
+    "value": "value_num",
+    "voltage": "voltage_num",
+    "watt": "watt_num",
+}
+
+PREFIXES = {
+    "p": 1e-12,
+    "n": 1e-9,
+    "u": 1e-6,
+    "µ": 1e-6,
+    "μ": 1e-6,
+    "m": 1e-3,
+    "k": 1e3,
+    "K": 1e3,
+    "M": 1e6,
+    "G": 1e9,
+}
+
+UNITS = r"(?:ohms?|Ω|F|W|V|A|Hz|H)?"
+
+# "4.7uF", "10K", "250mW", "5.6Kohm", "4k7", "4R7", "150R", "0R"
+SI_PATTERN = re.compile(
+    r"^(\d*\.?\d+)\s*([pnuµμmkKMGR]?)(\d*)\s*" + UNITS + r"$"
+)
+# "1/4W"
+FRACTION_PATTERN = re.compile(r"^(\d+)\s*/\s*(\d+)\s*" + UNITS + r"$")
+
+RANGE_PATTERN = re.compile(r"^(.+?)\s*(?:\.\.|-)\s*(.+)$")
+COMPARE_PATTERN = re.compile(r"^(>=|<=|>|<)\s*(.+)$")
+
+# Exact matches allow for float rounding between "4.7uF" and "0.0047mF"
+TOLERANCE = 1e-9
+
+BACKFILL_JOB = "parametric_backfill"
+
+
+def parse_si(text: str | None) -> float | None:
+    """Parse an engineering value like "4.7uF" or "4k7" into a float, or None."""
+    if not text:
+        return None
+
+    text = text.strip()
+
+    fraction = FRACTION_PATTERN.match(text)
+    if fraction:
+        numerator, denominator = int(fraction.group(1)), int(fraction.group(2))
+        return numerator / denominator if denominator else None
+
+    match = SI_PATTERN.match(text)
+    if not match:
+        return None
+
+    number, prefix, tail = match.groups()
+
+    # RKM notation puts the prefix where the decimal point goes: 4k7, 4R7
+    if tail:
+        if "." in number or not prefix:
+            return None
+        number = f"{number}.{tail}"
+
+    return float(number) * PREFIXES.get(prefix, 1)
+
+
+def normalize(component: Component):
+    """Refresh the numeric columns from the text fields. Does not commit."""
+    for field, num_field in PARAMETRIC_FIELDS.items():
+        setattr(component, num_field, parse_si(getattr(component, field)))
+
+
+def parse_range(text: str | None) -> tuple[float | None, float | None] | None:
+    """
+    Turn a filter like "9k-11k", "9k..11k", ">=0.5W" or "10k" into
+    (low, high) bounds. Returns None if the text isn't a numeric filter.
+    """
+    if not text:
+        return None
+
+    text = text.strip()
+
+    compare = COMPARE_PATTERN.match(text)
+    if compare:
+        op, operand = compare.groups()
+        number = parse_si(operand)
+        if number is None:
+            return None
+        # Strict comparisons step past the tolerance band
+        slack = 0 if op.endswith("=") else abs(number) * TOLERANCE
+        return (number + slack, None) if op.startswith(">") else (None, number - slack)
+
+    bounds = RANGE_PATTERN.match(text)
+    if bounds:
+        low, high = parse_si(bounds.group(1)), parse_si(bounds.group(2))
+        if low is None or high is None:
+            return None
+        return min(low, high), max(low, high)
+
+    number = parse_si(text)
+    if number is None:
+        return None
+
+    slack = abs(number) * TOLERANCE
+    return number - slack, number + slack
+
+
+def filter_parametric(query, field: str, text: str):
+    """
+    Range filter on the indexed numeric column when the text parses,
+    otherwise fall back to a substring match on the raw text.
+    """
+    column = getattr(Component, PARAMETRIC_FIELDS[field])
+    bounds = parse_range(text)
+
+    if bounds is None:
+        return query.filter(getattr(Component, field).ilike(f"%{text}%"))
+
+    low, high = bounds
+    if low is not None:
+        query = query.filter(column >= low)
+    if high is not None:
+        query = query.filter(column <= high)
+    return query
+
+
+def backfill_parametric_values():
+    """
+    Parse values for components saved before the numeric columns existed.
+    Each column is backfilled once and recorded in job_state, so text that
+    never parses ("N/A", "var") isn't re-read on every startup; later
+    writes keep the columns current through normalize().
+    """
+    db: Session = SessionLocal()
+    try:
+        done = db.query(JobState.value).filter(JobState.name == BACKFILL_JOB).scalar() or ""
+        todo = {
+            field: num_field
+            for field, num_field in PARAMETRIC_FIELDS.items()
+            if field not in done.split(",")
+        }
+        if not todo:
+            return
+
+        pending = or_(*[
+            (getattr(Component, field).isnot(None)) & (getattr(Component, num_field).is_(None))
+            for field, num_field in todo.items()
+        ])
+        for component in db.query(Component).filter(pending).all():
+            normalize(component)
+
+        db.merge(JobState(name=BACKFILL_JOB, value=",".join(PARAMETRIC_FIELDS)))
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.component import Component
+from app.models.request import Request as RequestModel
+from app.models.reservation import Reservation
+from app.services.inventory import get_component, held_quantity, record_takes, take_stock
+from app.services.loans import due_date_for
+
+DEFAULT_HOLD_HOURS = 24
+MAX_HOLD_HOURS = 24 * 14
+
+EXPIRE_BATCH_SIZE = 500
+
+
+def reserve(
+    db: Session,
+    user,
+    component_id: int,
+    quantity: int,
+    hours: int = DEFAULT_HOLD_HOURS,
+    remarks: str | None = None
+) -> Reservation:
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Invalid quantity")
+    if not 0 < hours <= MAX_HOLD_HOURS:
+        raise HTTPException(status_code=400, detail="Invalid hold period")
+
+    get_component(db, component_id)
+
+    now = datetime.utcnow()
+
+    # Insert only if enough unheld stock remains, in one statement
+    result = db.execute(
+        insert(Reservation).from_select(
+            ["user_id", "component_id", "quantity", "status", "remarks", "created_at", "expires_at"],
+            select(
+                literal(user.id),
+                Component.id,
+                literal(quantity),
+                literal("active"),
+                literal(remarks),
+                literal(now),
+                literal(now + timedelta(hours=hours))
+            ).where(
+                Component.id == component_id,
+                Component.deleted_at.is_(None),
+                Component.quantity - held_quantity(Component.id, now) >= quantity
+            )
+        )
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=400, detail="Insufficient stock")
+
+    db.commit()
+    return db.query(Reservation).filter(Reservation.id == result.lastrowid).first()
+
+
+def get_reservation(db: Session, user, reservation_id: int) -> Reservation:
+    reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+    if not reservation:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+
+    if user.role != "admin" and reservation.user_id != user.id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    return reservation
+
+
+def _close(db: Session, reservation: Reservation, status: str) -> bool:
+    result = db.execute(
+        update(Reservation)
+        .where(
+            Reservation.id == reservation.id,
+            Reservation.status == "active",
+            Reservation.expires_at > datetime.utcnow()
+        )
+        .values(status=status, closed_at=datetime.utcnow())
+        .execution_options(synchronize_session="fetch")
+    )
+    return result.rowcount == 1
+
+
+def convert(db: Session, user, reservation_id: int) -> RequestModel:
+    """Turn a hold into a borrow: close hold, take stock, record request."""
+    reservation = get_reservation(db, user, reservation_id)
+
+    if not _close(db, reservation, "converted"):
+        raise HTTPException(status_code=400, detail="Reservation is no longer active")
+
+    # The hold was just closed, so its units count as free for this take.
+    # Any failure leaves the transaction uncommitted and it rolls back.
+    takes = take_stock(db, reservation.component_id, reservation.quantity)
+
+    component = get_component(db, reservation.component_id)
+
+    req = RequestModel(
+        user_id=reservation.user_id,
+        component_id=reservation.component_id,
+        quantity=reservation.quantity,
+        status="borrowed",
+        due_at=due_date_for(db, component),
+        remarks=reservation.remarks
+    )
+    record_takes(db, req, takes)
+    db.commit()
+    return req
+
+
+def release(db: Session, user, reservation_id: int) -> Reservation:
+    reservation = get_reservation(db, user, reservation_id)
+
+    if not _close(db, reservation, "released"):
+        raise HTTPException(status_code=400, detail="Reservation is no longer active")
+
+    db.commit()
+    return reservation
+
+
+def expire_reservations() -> int:
+    """
+    Scheduled job: mark lapsed holds expired. Walks the (status, expires_at)
+    index from the oldest deadline, so cost scales with lapsed holds only.
+    Availability already ignores lapsed holds; this keeps statuses tidy.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        total = 0
+        while True:
+            ids = [
+                r.id for r in
+                db.query(Reservation.id)
+                .filter(Reservation.status == "active", Reservation.expires_at <= now)
+                .order_by(Reservation.expires_at)
+                .limit(EXPIRE_BATCH_SIZE)
+                .all()
+            ]
+            if not ids:
+                return total
+
+            db.execute(
+                update(Reservation)
+                .where(Reservation.id.in_(ids), Reservation.status == "active")
+                .values(status="expired", closed_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            total += len(ids)
+    finally:
+        db.close()
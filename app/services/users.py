@@ -0,0 +1,195 @@
+"""
+Bulk user provisioning for the admin CLI (`manage.py`).
+
+A CSV import validates every row before writing anything. Passwords are
+hashed across a process pool, since bcrypt is deliberately slow and
+CPU-bound, and the rows are inserted in batches inside one transaction, so
+a failed import leaves no partial set of users. Employee IDs that already
+exist are skipped, which makes re-running an import safe. Every created or
+changed user is written to the audit log as a change made by the system.
+"""
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import insert, update
+
+from app.core.audit import record, set_actor
+from app.core.database import SessionLocal
+from app.core.security import hash_password
+from app.core.sessions import revoke_user_sessions
+from app.models.user import User
+
+ROLES = ("admin", "user")
+DEFAULT_ROLE = "user"
+
+REQUIRED_COLUMNS = ("name", "employee_id", "password")
+
+INSERT_BATCH_SIZE = 500
+
+# Keeps the IN (...) lists well under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+HASH_CHUNK_SIZE = 16
+
+
+class ProvisioningError(Exception):
+    pass
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def read_users_csv(path: str) -> list[dict]:
+    """
+    Rows of a `name,employee_id,password[,role]` CSV. Raises
+    ProvisioningError listing every invalid row.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ProvisioningError(f"{path}: missing columns: {', '.join(missing)}")
+
+        rows, errors, seen = [], [], {}
+        for line, raw in enumerate(reader, start=2):
+            row = {
+                "name": (raw.get("name") or "").strip(),
+                "employee_id": (raw.get("employee_id") or "").strip(),
+                "password": raw.get("password") or "",
+                "role": (raw.get("role") or "").strip() or DEFAULT_ROLE
+            }
+
+            blank = [c for c in REQUIRED_COLUMNS if not row[c]]
+            if blank:
+                errors.append(f"line {line}: empty {', '.join(blank)}")
+            elif row["role"] not in ROLES:
+                errors.append(f"line {line}: unknown role {row['role']!r}")
+            elif row["employee_id"] in seen:
+                errors.append(f"line {line}: duplicate employee_id {row['employee_id']!r} (first on line {seen[row['employee_id']]})")
+            else:
+                seen[row["employee_id"]] = line
+                rows.append(row)
+
+    if errors:
+        raise ProvisioningError("\n".join(errors))
+    return rows
+
+
+def user_ids_by_employee_id(db, employee_ids: list[str]) -> dict:
+    found = {}
+    for chunk in _chunks(employee_ids, LOOKUP_CHUNK_SIZE):
+        query = db.query(User.employee_id, User.id).filter(User.employee_id.in_(chunk))
+        found.update(query)
+    return found
+
+
+def hash_passwords(passwords: list[str], workers: int | None = None) -> list[str]:
+    """bcrypt hashes in input order, computed on `workers` processes (all cores by default)."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < 2:
+        return [hash_password(p) for p in passwords]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(hash_password, passwords, chunksize=HASH_CHUNK_SIZE))
+
+
+def import_users(rows: list[dict], workers: int | None = None) -> tuple[int, list[str]]:
+    """Create the users that don't exist yet. Returns (created, skipped employee IDs)."""
+    db = SessionLocal()
+    try:
+        existing = user_ids_by_employee_id(db, [r["employee_id"] for r in rows])
+        new_rows = [r for r in rows if r["employee_id"] not in existing]
+
+        hashes = hash_passwords([r["password"] for r in new_rows], workers)
+
+        values = [
+            {
+                "name": r["name"],
+                "employee_id": r["employee_id"],
+                "role": r["role"],
+                "password_hash": h,
+                "is_active": True
+            }
+            for r, h in zip(new_rows, hashes)
+        ]
+        for batch in _chunks(values, INSERT_BATCH_SIZE):
+            db.execute(insert(User), batch)
+
+        # Audited as created by the system, one entry per new user
+        set_actor(db, None)
+        created = user_ids_by_employee_id(db, [v["employee_id"] for v in values])
+        for v in values:
+            record(
+                db, User.__tablename__, created[v["employee_id"]],
+                {name: [None, value] for name, value in v.items()},
+                action="create"
+            )
+        db.commit()
+
+        return len(values), sorted(existing)
+    finally:
+        db.close()
+
+
+def _check_admins_remain(db, user_ids: list[int]):
+    """Refuse a change that would leave no active admin. Caller applies the change after this."""
+    admins = {
+        i for (i,) in db.query(User.id).filter(User.role == "admin", User.is_active == True)
+    }
+    if not admins - set(user_ids):
+        raise ProvisioningError("Cannot remove the last admin")
+
+
+def _update(employee_ids: list[str], values: dict, demotes_admins: bool) -> tuple[list[int], int, list[str]]:
+    db = SessionLocal()
+    try:
+        found = user_ids_by_employee_id(db, employee_ids)
+        user_ids = list(found.values())
+        missing = sorted(set(employee_ids) - set(found))
+
+        if demotes_admins and user_ids:
+            _check_admins_remain(db, user_ids)
+
+        # Audited as a change made by the system
+        set_actor(db, None)
+
+        changed = 0
+        columns = [getattr(User, name) for name in values]
+        for chunk in _chunks(user_ids, LOOKUP_CHUNK_SIZE):
+            for user_id, *old in db.query(User.id, *columns).filter(User.id.in_(chunk)):
+                changes = {
+                    name: [before, value]
+                    for name, before, value in zip(values, old, values.values())
+                    if before != value
+                }
+                if changes:
+                    record(db, User.__tablename__, user_id, changes)
+
+            changed += db.execute(
+                update(User).where(User.id.in_(chunk)).values(**values)
+            ).rowcount
+        db.commit()
+
+        return user_ids, changed, missing
+    finally:
+        db.close()
+
+
+def set_active(employee_ids: list[str], active: bool) -> tuple[int, list[str]]:
+    """Enable or disable users, logging disabled ones out. Returns (updated, unknown employee IDs)."""
+    user_ids, changed, missing = _update(employee_ids, {"is_active": active}, demotes_admins=not active)
+    if not active:
+        for user_id in user_ids:
+            revoke_user_sessions(user_id)
+    return changed, missing
+
+
+def set_role(employee_ids: list[str], role: str) -> tuple[int, list[str]]:
+    """Give users a role. Returns (updated, unknown employee IDs)."""
+    if role not in ROLES:
+        raise ProvisioningError(f"Unknown role {role!r}, expected one of: {', '.join(ROLES)}")
+    _, changed, missing = _update(employee_ids, {"role": role}, demotes_admins=role != "admin")
+    return changed, missing
@@ -0,0 +1,76 @@
+"""
+Database backup tool.
+
+    python backup.py snapshot          take a snapshot now
+    python backup.py list              list snapshots, newest first
+    python backup.py verify [PATH]     check one snapshot, or all of them
+    python backup.py prune [--keep N]  delete all but the newest N
+    python backup.py restore PATH      restore a snapshot (stop the app first)
+"""
+import argparse
+import os
+import sys
+
+from app.core import backup
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inventory database backups")
+    parser.add_argument("--dir", default=backup.BACKUP_DIR, help="snapshot directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("snapshot")
+    commands.add_parser("list")
+
+    verify = commands.add_parser("verify")
+    verify.add_argument("path", nargs="?")
+
+    prune = commands.add_parser("prune")
+    prune.add_argument("--keep", type=int, default=backup.BACKUP_KEEP)
+
+    restore = commands.add_parser("restore")
+    restore.add_argument("path")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "snapshot":
+            path = backup.snapshot(args.dir)
+            backup.verify(path)
+            print(path)
+
+        elif args.command == "list":
+            for path in backup.snapshots(args.dir):
+                print(f"{path}  {os.path.getsize(path) // 1024} KB")
+
+        elif args.command == "verify":
+            paths = [args.path] if args.path else backup.snapshots(args.dir)
+            failed = 0
+            for path in paths:
+                try:
+                    backup.verify(path)
+                    print(f"OK    {path}")
+                except backup.BackupError as e:
+                    print(f"FAIL  {e}")
+                    failed += 1
+            return 1 if failed else 0
+
+        elif args.command == "prune":
+            for path in backup.prune(args.keep, args.dir):
+                print(f"removed {path}")
+
+        elif args.command == "restore":
+            safety = backup.restore(args.path)
+            if safety:
+                print(f"previous database saved to {safety}")
+            print(f"restored {args.path}")
+
+    except backup.BackupError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
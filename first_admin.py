@@ -1,16 +1,26 @@
-from app.core.database import SessionLocal
+# Only the users table and the password hasher are needed here, so this
+# deliberately doesn't import the app (routers, indexes, migrations).
+from app.core.database import SessionLocal, engine
 from app.models.user import User
 from app.core.security import hash_password
 
+EMPLOYEE_ID = "bpe252610"
+
+User.__table__.create(bind=engine, checkfirst=True)
+
 db = SessionLocal()
 
-admin = User(
-    name="admin",
-    employee_id="bpe252610",
-    role="admin",
-    password_hash=hash_password("admin123")
-)
+if db.query(User.id).filter(User.employee_id == EMPLOYEE_ID).first():
+    print(f"Admin {EMPLOYEE_ID} already exists")
+else:
+    admin = User(
+        name="admin",
+        employee_id=EMPLOYEE_ID,
+        role="admin",
+        password_hash=hash_password("admin123")
+    )
+
+    db.add(admin)
+    db.commit()
 
-db.add(admin)
-db.commit()
 db.close()
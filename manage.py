@@ -0,0 +1,131 @@
+"""
+Admin and maintenance tool.
+
+    python manage.py migrate                           create/upgrade the schema
+    python manage.py import-users FILE [--workers N]   create users from a CSV
+    python manage.py disable ID... [--file F]          disable users by employee ID
+    python manage.py enable ID... [--file F]           re-enable users
+    python manage.py set-role ROLE ID... [--file F]    change users' role
+    python manage.py vacuum                            rebuild the database file
+    python manage.py analyze                           refresh planner statistics
+    python manage.py check                             run an integrity check
+    python manage.py build-assets                      fingerprint and compress static files
+    python manage.py forecast                          recompute reorder forecasts
+
+The import CSV has a header row with name, employee_id, password and an
+optional role column (default "user"). --file takes one employee ID per line.
+"""
+import argparse
+import sys
+import time
+
+from app.core import assets, database
+from app.core.audit import audit_writer
+from app.services import users
+
+SHOW_SKIPPED = 10
+
+
+def employee_ids(args) -> list[str]:
+    ids = list(args.ids)
+    if args.file:
+        with open(args.file, encoding="utf-8-sig") as f:
+            ids.extend(line.strip() for line in f if line.strip())
+    if not ids:
+        raise users.ProvisioningError("no employee IDs given")
+    return list(dict.fromkeys(ids))
+
+
+def report_update(changed: int, missing: list[str]):
+    print(f"updated {changed} user(s)")
+    for employee_id in missing:
+        print(f"not found: {employee_id}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inventory administration")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate")
+
+    import_users = commands.add_parser("import-users")
+    import_users.add_argument("file")
+    import_users.add_argument("--workers", type=int, help="hashing processes (default: all cores)")
+
+    for name in ("disable", "enable"):
+        bulk = commands.add_parser(name)
+        bulk.add_argument("ids", nargs="*")
+        bulk.add_argument("--file")
+
+    set_role = commands.add_parser("set-role")
+    set_role.add_argument("role", choices=users.ROLES)
+    set_role.add_argument("ids", nargs="*")
+    set_role.add_argument("--file")
+
+    commands.add_parser("vacuum")
+    commands.add_parser("analyze")
+    commands.add_parser("check")
+    commands.add_parser("build-assets")
+    commands.add_parser("forecast")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "migrate":
+            from app.core.startup import migrate
+            migrate()
+            print("schema up to date")
+
+        elif args.command == "import-users":
+            rows = users.read_users_csv(args.file)
+            started = time.perf_counter()
+            created, skipped = users.import_users(rows, args.workers)
+            print(f"created {created} user(s) in {time.perf_counter() - started:.1f}s")
+            if skipped:
+                shown = ", ".join(skipped[:SHOW_SKIPPED]) + (", ..." if len(skipped) > SHOW_SKIPPED else "")
+                print(f"skipped {len(skipped)} existing employee ID(s): {shown}")
+
+        elif args.command in ("disable", "enable"):
+            report_update(*users.set_active(employee_ids(args), args.command == "enable"))
+
+        elif args.command == "set-role":
+            report_update(*users.set_role(employee_ids(args), args.role))
+
+        elif args.command == "vacuum":
+            database.vacuum()
+            print("vacuumed")
+
+        elif args.command == "analyze":
+            database.analyze()
+            print("analyzed")
+
+        elif args.command == "check":
+            problems = database.integrity_check()
+            for problem in problems:
+                print(problem)
+            if problems:
+                return 1
+            print("ok")
+
+        elif args.command == "build-assets":
+            manifest = assets.build_assets()
+            print(f"built {len(manifest)} asset(s) into {assets.STATIC_DIR}/{assets.DIST}")
+
+        elif args.command == "forecast":
+            from app.services.forecast import compute_forecasts
+            started = time.perf_counter()
+            scored = compute_forecasts()
+            print(f"scored {scored} component(s) in {time.perf_counter() - started:.1f}s")
+
+    except (users.ProvisioningError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        # The writer thread is a daemon: flush its buffer before exiting
+        audit_writer.stop()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
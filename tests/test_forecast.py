@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import user, component, stock_location, request_archive  # noqa: F401 (register the tables)
+from app.models.request import Request as RequestModel
+from app.services.forecast import HISTORY_DAYS, demand_matrix
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def borrow(db, component_id, quantity, at):
+    db.add(RequestModel(user_id=1, component_id=component_id, quantity=quantity, status="borrowed", requested_at=at))
+
+
+def test_demand_matrix_includes_today(db):
+    now = datetime(2026, 10, 19, 15, 30)
+    borrow(db, 1, 4, now.replace(hour=9))
+    borrow(db, 1, 2, now - timedelta(days=1))
+    db.commit()
+
+    ids, matrix = demand_matrix(db, now)
+
+    assert ids.tolist() == [1]
+    assert matrix.shape == (1, HISTORY_DAYS)
+    assert matrix[0, -1] == 4
+    assert matrix[0, -2] == 2
+
+
+def test_demand_matrix_window_is_history_days_long(db):
+    now = datetime(2026, 10, 19, 15, 30)
+    oldest = now - timedelta(days=HISTORY_DAYS - 1)
+    borrow(db, 1, 3, oldest.replace(hour=0))
+    borrow(db, 2, 5, oldest - timedelta(days=1))
+    db.commit()
+
+    ids, matrix = demand_matrix(db, now)
+
+    assert ids.tolist() == [1]
+    assert matrix[0, 0] == 3
+    assert matrix.sum() == 3
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import user, component, stock_location, request, reservation  # noqa: F401 (register the tables)
+from app.models.component import Component
+from app.models.stock_location import StockLocation
+from app.models.user import User
+from app.services.inventory import borrow_component, return_request
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def setup(db):
+    admin = User(name="admin", employee_id="A1", password_hash="x", role="admin", is_active=True)
+    part = Component(category="R", description="10k", part_no="R-10K", rack="A", location="1", quantity=5)
+    db.add_all([admin, part])
+    db.flush()
+    db.add_all([
+        StockLocation(component_id=part.id, rack="A", location="1", quantity=3),
+        StockLocation(component_id=part.id, rack="B", location="2", quantity=2),
+    ])
+    db.commit()
+    return admin, part
+
+
+def bins(db):
+    db.expire_all()
+    return [q for (q,) in db.query(StockLocation.quantity).order_by(StockLocation.id)]
+
+
+def test_borrow_spanning_bins_returns_to_the_same_bins(db, setup):
+    admin, part = setup
+
+    req = borrow_component(db, admin, part.id, 4)
+    assert bins(db) == [0, 1]
+
+    return_request(db, admin, req.id, 4)
+    assert bins(db) == [3, 2]
+
+
+def test_partial_return_refills_bins_in_take_order(db, setup):
+    admin, part = setup
+
+    req = borrow_component(db, admin, part.id, 4)
+    return_request(db, admin, req.id, 3)
+
+    assert bins(db) == [3, 1]